@@ -5,10 +5,11 @@
 import asyncio
 import os
 import sys
-import json
 from pathlib import Path
 from typing import Dict, Any, List
 
+import orjson
+
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
@@ -16,30 +17,24 @@ from demo_video_generator.core.ai_generator_v2 import (
     WebsiteAnalyzer,
     MultiProviderScriptGenerator,
     ModelProvider,
+    close_http_client,
 )
 
+# 同时请求的提供商上限, 避免触发各家 API 的限流
+MAX_CONCURRENT_PROVIDERS = 3
+
 
 async def test_single_provider(
     provider: ModelProvider,
-    url: str,
+    analysis: Dict[str, Any],
     api_key: str = None
 ) -> Dict[str, Any]:
-    """测试单个 AI 提供商"""
+    """测试单个 AI 提供商 (使用预先分析好的网站结果)"""
     print(f"\n{'='*80}")
     print(f"测试提供商: {provider.upper()}")
     print(f"{'='*80}")
 
     try:
-        # 1. 分析网站
-        print(f"\n[1/3] 分析网站: {url}")
-        analyzer = WebsiteAnalyzer()
-        analysis = await analyzer.analyze(url)
-
-        print(f"  ✓ 标题: {analysis.get('title', 'N/A')}")
-        print(f"  ✓ 主要标题数: {len(analysis.get('headings', []))}")
-        print(f"  ✓ CTA 按钮数: {len(analysis.get('ctas', []))}")
-        print(f"  ✓ 页面高度: {analysis.get('page_height', 0)}px")
-
         # 2. 生成脚本
         print(f"\n[2/3] 使用 {provider} 生成脚本...")
         generator = MultiProviderScriptGenerator(provider=provider, api_key=api_key)
@@ -58,13 +53,17 @@ async def test_single_provider(
         scenes = script.get("scenes", [])
         print(f"  ✓ 场景数量: {len(scenes)}")
 
-        total_duration = 0
-        for i, scene in enumerate(scenes, 1):
-            duration = scene.get("duration", 0)
-            total_duration += duration
+        # 每个场景只取一次时长和操作数, 指标和打印共用
+        durations = [scene.get("duration", 0) for scene in scenes]
+        action_counts = [len(scene.get("actions", [])) for scene in scenes]
+        total_duration = sum(durations)
+
+        for i, (scene, duration, actions) in enumerate(
+            zip(scenes, durations, action_counts), 1
+        ):
             print(f"  ✓ 场景 {i}: {scene.get('id', 'N/A')} ({duration}秒)")
             print(f"    - 解说: {scene.get('narration', '')[:50]}...")
-            print(f"    - 操作数: {len(scene.get('actions', []))}")
+            print(f"    - 操作数: {actions}")
 
         print(f"\n  总时长: {total_duration}秒 (要求: {requirements['video_length']}秒)")
 
@@ -76,7 +75,7 @@ async def test_single_provider(
                 "scene_count": len(scenes),
                 "total_duration": total_duration,
                 "avg_scene_duration": total_duration / len(scenes) if scenes else 0,
-                "total_actions": sum(len(s.get("actions", [])) for s in scenes),
+                "total_actions": sum(action_counts),
             }
         }
 
@@ -122,9 +121,31 @@ async def compare_providers(
 
     print(f"\n准备测试 {len(providers)} 个 AI 提供商: {', '.join(providers)}")
 
-    # 并行测试所有提供商
-    tasks = [test_single_provider(p, url) for p in providers]
-    results = await asyncio.gather(*tasks)
+    # 1. 分析网站 (所有提供商共用一次分析结果)
+    print(f"\n[1/3] 分析网站: {url}")
+    analyzer = WebsiteAnalyzer()
+    analysis = await analyzer.analyze(url)
+
+    print(f"  ✓ 标题: {analysis.get('title', 'N/A')}")
+    print(f"  ✓ 主要标题数: {len(analysis.get('headings', []))}")
+    print(f"  ✓ CTA 按钮数: {len(analysis.get('cta_buttons', []))}")
+    print(f"  ✓ 页面高度: {analysis.get('page_height', 0)}px")
+
+    # 并行测试所有提供商 (限制并发数)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROVIDERS)
+
+    async def bounded_test(provider: ModelProvider) -> Dict[str, Any]:
+        async with semaphore:
+            return await test_single_provider(provider, analysis)
+
+    outcomes = await asyncio.gather(
+        *(bounded_test(p) for p in providers), return_exceptions=True
+    )
+    results = [
+        {"provider": p, "success": False, "error": str(o)}
+        if isinstance(o, BaseException) else o
+        for p, o in zip(providers, outcomes)
+    ]
 
     # 汇总结果
     print(f"\n{'='*80}")
@@ -176,8 +197,9 @@ async def compare_providers(
     output_file = Path("output/ai_comparison_results.json")
     output_file.parent.mkdir(exist_ok=True)
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(comparison, f, ensure_ascii=False, indent=2)
+    # 序列化为 bytes 后在线程中一次写入, 不阻塞事件循环
+    data = orjson.dumps(comparison, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    await asyncio.to_thread(output_file.write_bytes, data)
 
     print(f"\n详细结果已保存到: {output_file}")
 
@@ -204,11 +226,22 @@ async def main():
   - GOOGLE_API_KEY:    {'✓' if os.getenv('GOOGLE_API_KEY') else '✗'}
 """)
 
-    # 运行对比测试
-    await compare_providers(test_url)
+    # 运行对比测试 (所有提供商共用一个 HTTP 连接池, 结束后关闭)
+    try:
+        await compare_providers(test_url)
+    finally:
+        await close_http_client()
 
     print("\n测试完成!")
 
 
 if __name__ == "__main__":
+    # uvloop 随 uvicorn[standard] 安装, 可用时替换默认事件循环
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        uvloop.install()
+
     asyncio.run(main())
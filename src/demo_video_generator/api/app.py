@@ -1,18 +1,26 @@
 """FastAPI application for demo video generator."""
 
 from fastapi import FastAPI, BackgroundTasks, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+import shutil
 import uuid
 import json
 
+from .tasks import create_task_store
+
 app = FastAPI(
     title="Demo Video Generator API",
     description="AI-powered product demo video generator",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware for web frontend
@@ -24,8 +32,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory task storage (use Redis in production)
-tasks: dict[str, dict] = {}
+# Task state storage (in memory, or Redis when REDIS_URL is set)
+tasks = create_task_store()
+
+# Maximum number of concurrent Edge TTS requests per task
+TTS_CONCURRENCY = 8
+
+# Narration audio shared by all tasks, keyed by text + voice
+AUDIO_CACHE_DIR = Path("./output/audio_cache")
+
+# Worker processes for browser recording and video encoding. Both block, so
+# running them here keeps the event loop free and lets tasks encode in parallel.
+# Workers are spawned, not forked: they start on first use, from inside the
+# running server, and forking a process that already has threads can deadlock.
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+video_pool = ProcessPoolExecutor(
+    max_workers=VIDEO_WORKERS,
+    mp_context=multiprocessing.get_context("spawn"),
+)
 
 
 class ProjectConfig(BaseModel):
@@ -68,6 +92,15 @@ class TaskStatus(BaseModel):
     error: Optional[str] = None
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    from ..core.ai_generator_v2 import close_http_client
+
+    await tasks.close()
+    await close_http_client()
+    video_pool.shutdown(wait=False, cancel_futures=True)
+
+
 @app.get("/")
 async def root():
     return {"message": "Demo Video Generator API", "version": "0.1.0"}
@@ -78,62 +111,99 @@ async def generate_video(request: GenerateRequest, background_tasks: BackgroundT
     """Start a video generation task."""
     task_id = str(uuid.uuid4())
     
-    tasks[task_id] = {
+    task = {
         "status": "pending",
         "progress": 0.0,
         "message": "Task queued",
         "output_path": None,
         "error": None,
     }
+    await tasks.create(task_id, task)
     
-    # Add to background tasks
-    background_tasks.add_task(process_video_task, task_id, request.script.model_dump())
+    # Add to background tasks; the script is dumped to a dict there, after the
+    # response has been sent
+    background_tasks.add_task(process_video_task, task_id, request.script)
     
-    return TaskStatus(task_id=task_id, **tasks[task_id])
+    return TaskStatus(task_id=task_id, **task)
 
 
 @app.get("/api/v1/tasks/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     """Get the status of a generation task."""
-    if task_id not in tasks:
+    task = await tasks.get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return TaskStatus(task_id=task_id, **tasks[task_id])
+    return TaskStatus(task_id=task_id, **task)
 
 
 @app.get("/api/v1/tasks/{task_id}/download")
 async def download_video(task_id: str):
     """Download the generated video."""
-    if task_id not in tasks:
+    task = await tasks.get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = tasks[task_id]
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="Video not ready")
     
     output_path = task["output_path"]
-    if not output_path or not Path(output_path).exists():
+    try:
+        stat_result = os.stat(output_path) if output_path else None
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None:
         raise HTTPException(status_code=404, detail="Video file not found")
     
+    # Passing stat_result lets Starlette set Content-Length/ETag up front;
+    # Starlette >= 0.39 also serves Range requests (and sets Accept-Ranges),
+    # so players can seek and downloads can resume
     return FileResponse(
         output_path,
         media_type="video/mp4",
         filename=Path(output_path).name,
+        stat_result=stat_result,
+    )
+
+
+def _record_video(output_dir, resolution, scenes, scene_durations):
+    """Record the scenes in a browser. Runs in ``video_pool``."""
+    from ..core.recorder import VideoRecorder
+
+    recorder = VideoRecorder(
+        output_dir=output_dir,
+        resolution=resolution,
+        headless=True,
     )
+    return recorder.record(scenes=scenes, scene_durations=scene_durations)
 
 
-async def process_video_task(task_id: str, script_data: dict):
+def _merge_video(fps, bitrate, result, audio_dir, output_path, narrations):
+    """Encode the final video and its subtitles. Runs in ``video_pool``."""
+    from ..core.merger import VideoMerger
+
+    merger = VideoMerger(fps=fps, bitrate=bitrate)
+    merger.merge(
+        video_path=result.video_path,
+        audio_dir=audio_dir,
+        timestamps=result.timestamps,
+        output_path=output_path,
+        trim_start=result.login_duration,
+    )
+    merger.generate_srt(result.timestamps, narrations, output_path.with_suffix(".srt"))
+
+
+async def process_video_task(task_id: str, script_data: dict | ScriptConfig):
     """Process video generation task."""
     from ..core.script import Script
     from ..core.tts import TTSEngine
-    from ..core.recorder import VideoRecorder
-    from ..core.merger import VideoMerger
 
     try:
-        tasks[task_id]["status"] = "processing"
-        tasks[task_id]["message"] = "Parsing script..."
+        await tasks.update(task_id, status="processing", message="Parsing script...")
 
         # Parse script
+        if isinstance(script_data, ScriptConfig):
+            script_data = script_data.model_dump()
         script = Script.from_dict(script_data)
 
         # Setup paths
@@ -143,74 +213,74 @@ async def process_video_task(task_id: str, script_data: dict):
         audio_dir.mkdir(exist_ok=True)
 
         # Generate audio
-        tasks[task_id]["message"] = "Generating audio..."
-        tasks[task_id]["progress"] = 0.1
+        await tasks.update(task_id, message="Generating audio...", progress=0.1)
 
         tts = TTSEngine(voice=script.project.voice)
-        scene_durations = {}
+        semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+        completed = 0
 
-        for i, scene in enumerate(script.scenes):
+        async def scene_duration(scene):
+            nonlocal completed
             if scene.narration:
-                audio_path = audio_dir / f"{scene.id}.mp3"
-                duration = tts.generate(scene.narration, audio_path)
-                scene_durations[scene.id] = duration
+                async with semaphore:
+                    cached_path, duration = await tts.generate_cached(scene.narration, AUDIO_CACHE_DIR)
+                shutil.copyfile(cached_path, audio_dir / f"{scene.id}.mp3")
             else:
-                scene_durations[scene.id] = scene.duration or 3.0
-
-            tasks[task_id]["progress"] = 0.1 + (0.3 * (i + 1) / len(script.scenes))
+                duration = scene.duration or 3.0
 
-        # Record video
-        tasks[task_id]["message"] = "Recording video..."
-        tasks[task_id]["progress"] = 0.4
+            completed += 1
+            await tasks.update(task_id, progress=0.1 + (0.3 * completed / len(script.scenes)))
+            return duration
 
-        recorder = VideoRecorder(
-            output_dir=output_dir,
-            resolution=tuple(script.project.resolution),
-            headless=True,
-        )
+        # Synthesize all narrations concurrently
+        durations = await asyncio.gather(*[scene_duration(s) for s in script.scenes])
+        scene_durations = {s.id: d for s, d in zip(script.scenes, durations)}
 
-        result = recorder.record(
-            scenes=script.scenes,
-            scene_durations=scene_durations,
+        # Record video
+        await tasks.update(task_id, message="Recording video...", progress=0.4)
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            video_pool,
+            _record_video,
+            output_dir,
+            tuple(script.project.resolution),
+            script.scenes,
+            scene_durations,
         )
 
-        tasks[task_id]["progress"] = 0.7
-
-        # Merge video and audio
-        tasks[task_id]["message"] = "Merging video and audio..."
+        # Merge video and audio, then write subtitles
+        await tasks.update(task_id, message="Merging video and audio...", progress=0.7)
 
         output_path = output_dir / "output.mp4"
-        merger = VideoMerger(
-            fps=script.project.fps,
-            bitrate=script.project.bitrate,
-        )
-
-        merger.merge(
-            video_path=result.video_path,
-            audio_dir=audio_dir,
-            timestamps=result.timestamps,
-            output_path=output_path,
-            trim_start=result.login_duration,
-        )
-
-        tasks[task_id]["progress"] = 0.9
-
-        # Generate subtitles
-        tasks[task_id]["message"] = "Generating subtitles..."
         narrations = {s.id: s.narration for s in script.scenes if s.narration}
-        srt_path = output_path.with_suffix(".srt")
-        merger.generate_srt(result.timestamps, narrations, srt_path)
+        await loop.run_in_executor(
+            video_pool,
+            _merge_video,
+            script.project.fps,
+            script.project.bitrate,
+            result,
+            audio_dir,
+            output_path,
+            narrations,
+        )
 
         # Done
-        tasks[task_id]["status"] = "completed"
-        tasks[task_id]["progress"] = 1.0
-        tasks[task_id]["message"] = "Video generation completed"
-        tasks[task_id]["output_path"] = str(output_path)
+        await tasks.update(
+            task_id,
+            status="completed",
+            progress=1.0,
+            message="Video generation completed",
+            output_path=str(output_path),
+        )
 
     except Exception as e:
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["error"] = str(e)
-        tasks[task_id]["message"] = f"Error: {str(e)}"
+        await tasks.update(
+            task_id,
+            status="failed",
+            error=str(e),
+            message=f"Error: {str(e)}",
+        )
 
 
 # New AI Script Generation Endpoints
@@ -228,6 +298,32 @@ class AIGenerateResponse(BaseModel):
     """Response from AI script generation."""
     script: dict
     analysis: dict
+    cache_hit: bool = False  # Provider served the static prompt from its cache
+    cached_tokens: int = 0
+
+
+async def _generate_ai_script(request: AIGenerateRequest) -> tuple[dict, dict, int]:
+    """Analyze the website and generate a script with Claude.
+
+    Returns the script, the website analysis and the number of prompt
+    tokens served from the provider's prompt cache.
+    """
+    from ..core.ai_generator_v2 import WebsiteAnalyzer, MultiProviderScriptGenerator
+
+    analysis = await WebsiteAnalyzer().analyze(request.url)
+
+    generator = MultiProviderScriptGenerator(provider="claude")
+    script = await generator.generate_script(
+        analysis,
+        {
+            "video_length": request.video_length,
+            "style": request.style,
+            "language": request.language,
+            "focus_areas": request.focus_areas,
+        },
+    )
+
+    return script, analysis, generator.last_cached_tokens
 
 
 @app.post("/api/v1/ai/generate-script", response_model=AIGenerateResponse)
@@ -236,21 +332,15 @@ async def ai_generate_script(request: AIGenerateRequest):
 
     Analyzes the website and automatically creates a complete script.
     """
-    from ..core.ai_generator import generate_demo_script
-
     try:
         # Generate script using AI
-        script = await generate_demo_script(
-            url=request.url,
-            video_length=request.video_length,
-            style=request.style,
-            language=request.language,
-            focus_areas=request.focus_areas
-        )
+        script, analysis, cached_tokens = await _generate_ai_script(request)
 
         return AIGenerateResponse(
             script=script,
-            analysis={"url": request.url}  # Could include more analysis details
+            analysis=analysis,
+            cache_hit=cached_tokens > 0,
+            cached_tokens=cached_tokens,
         )
 
     except Exception as e:
@@ -263,22 +353,14 @@ async def ai_generate_video(request: AIGenerateRequest, background_tasks: Backgr
 
     Analyzes website, generates script, and creates video in one step.
     """
-    from ..core.ai_generator import generate_demo_script
-
     try:
         # Generate script
-        script_data = await generate_demo_script(
-            url=request.url,
-            video_length=request.video_length,
-            style=request.style,
-            language=request.language,
-            focus_areas=request.focus_areas
-        )
+        script_data, _, _ = await _generate_ai_script(request)
 
         # Create video generation task
         task_id = str(uuid.uuid4())
 
-        tasks[task_id] = {
+        task = {
             "status": "pending",
             "progress": 0.0,
             "message": "AI script generated, starting video creation...",
@@ -286,11 +368,12 @@ async def ai_generate_video(request: AIGenerateRequest, background_tasks: Backgr
             "error": None,
             "script": script_data,  # Include generated script in response
         }
+        await tasks.create(task_id, task)
 
         # Add to background tasks
         background_tasks.add_task(process_video_task, task_id, script_data)
 
-        return TaskStatus(task_id=task_id, **tasks[task_id])
+        return TaskStatus(task_id=task_id, **task)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate video: {str(e)}")
@@ -0,0 +1,95 @@
+"""Task state storage for the API.
+
+Tasks are kept in process memory by default. Set ``REDIS_URL`` to share
+task state between Uvicorn workers; each task is then stored as a Redis
+hash under ``task:{task_id}``.
+"""
+
+import json
+import os
+from typing import Any, Optional
+
+
+class TaskStore:
+    """In-memory task store (single process only)."""
+
+    def __init__(self):
+        self._tasks: dict[str, dict] = {}
+
+    async def create(self, task_id: str, fields: dict[str, Any]) -> None:
+        """Store a new task with its initial fields."""
+        self._tasks[task_id] = dict(fields)
+
+    async def update(self, task_id: str, **fields: Any) -> None:
+        """Update several fields of a task at once."""
+        self._tasks[task_id].update(fields)
+
+    async def get(self, task_id: str) -> Optional[dict]:
+        """Return all fields of a task, or None if it doesn't exist."""
+        task = self._tasks.get(task_id)
+        return dict(task) if task is not None else None
+
+    async def close(self) -> None:
+        """Release resources held by the store."""
+
+
+# HSET only if the task still exists, atomically
+_UPDATE_EXISTING_LUA = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return redis.call("HSET", KEYS[1], unpack(ARGV))
+end
+return 0
+"""
+
+
+class RedisTaskStore(TaskStore):
+    """Redis-backed task store shared by all API workers.
+
+    Field values are JSON-encoded so floats, None and nested dicts survive
+    the round trip through Redis strings.
+    """
+
+    def __init__(self, url: str, ttl: int = 7 * 24 * 3600):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.ttl = ttl
+        self._update_existing = self.redis.register_script(_UPDATE_EXISTING_LUA)
+
+    @staticmethod
+    def _key(task_id: str) -> str:
+        return f"task:{task_id}"
+
+    @staticmethod
+    def _encode(fields: dict[str, Any]) -> dict[str, str]:
+        return {k: json.dumps(v, ensure_ascii=False) for k, v in fields.items()}
+
+    async def create(self, task_id: str, fields: dict[str, Any]) -> None:
+        key = self._key(task_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=self._encode(fields))
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def update(self, task_id: str, **fields: Any) -> None:
+        # One script call per update keeps status/message/progress changes to
+        # a single round trip; an expired task is not recreated without a TTL
+        args = [item for pair in self._encode(fields).items() for item in pair]
+        await self._update_existing(keys=[self._key(task_id)], args=args)
+
+    async def get(self, task_id: str) -> Optional[dict]:
+        data = await self.redis.hgetall(self._key(task_id))
+        if not data:
+            return None
+        return {k.decode(): json.loads(v) for k, v in data.items()}
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_task_store() -> TaskStore:
+    """Create the task store configured by the ``REDIS_URL`` env var."""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisTaskStore(redis_url)
+    return TaskStore()
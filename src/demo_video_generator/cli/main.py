@@ -1,5 +1,7 @@
 """CLI entry point for demo video generator."""
 
+import asyncio
+import shutil
 import click
 from pathlib import Path
 from rich.console import Console
@@ -12,6 +14,9 @@ from ..core.merger import VideoMerger
 
 console = Console()
 
+# Maximum number of concurrent Edge TTS requests
+TTS_CONCURRENCY = 8
+
 
 @click.group()
 @click.version_option(version="0.1.0")
@@ -27,7 +32,12 @@ def cli():
 @click.option("--resolution", default="1440x900", help="Video resolution (WxH)")
 @click.option("--voice", default="zh-CN-XiaoxiaoNeural", help="TTS voice")
 @click.option("--headless", is_flag=True, help="Run browser in headless mode")
-def generate(script, output, audio_dir, resolution, voice, headless):
+@click.option(
+    "--parallel",
+    is_flag=True,
+    help="Record scenes that open their own URL concurrently (they must not rely on earlier scenes' state)",
+)
+def generate(script, output, audio_dir, resolution, voice, headless, parallel):
     """Generate demo video from script."""
     console.print(f"[bold blue]🎬 Demo Video Generator[/bold blue]")
     console.print(f"📄 Script: {script}")
@@ -39,7 +49,9 @@ def generate(script, output, audio_dir, resolution, voice, headless):
     # Parse script
     console.print("\n[bold]1. Parsing script...[/bold]")
     script_data = ScriptParser.parse(script)
-    console.print(f"   ✅ Loaded {len(script_data.scenes)} scenes")
+    scenes = script_data.scenes
+    n_scenes = len(scenes)
+    console.print(f"   ✅ Loaded {n_scenes} scenes")
     
     # Setup paths
     output_path = Path(output)
@@ -52,53 +64,67 @@ def generate(script, output, audio_dir, resolution, voice, headless):
         audio_dir = Path(audio_dir)
     audio_dir.mkdir(parents=True, exist_ok=True)
     
-    # Generate audio
-    console.print("\n[bold]2. Generating audio...[/bold]")
+    recorder = VideoRecorder(
+        output_dir=output_dir,
+        resolution=(width, height),
+        headless=headless,
+        # Unchanged --parallel segments are reused across runs
+        clip_cache_dir=output_dir / "clip_cache",
+    )
+    
+    def on_scene_start(scene_id, index):
+        console.print(f"   📍 Scene {index}/{n_scenes}: {scene_id}")
+    
+    # Generate audio and record video
+    console.print("\n[bold]2. Generating audio and recording video...[/bold]")
     tts = TTSEngine(voice=voice)
-    scene_durations = {}
+    # Audio keyed by narration + voice, reused across runs
+    cache_dir = output_dir / "audio_cache"
     
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         console=console,
     ) as progress:
-        task = progress.add_task("Generating...", total=len(script_data.scenes))
+        task = progress.add_task("Generating audio...", total=n_scenes)
+        # Edge TTS is network-bound, so synthesize scenes concurrently
+        semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
         
-        for scene in script_data.scenes:
+        async def scene_duration(scene):
             if scene.narration:
-                audio_path = audio_dir / f"{scene.id}.mp3"
-                if not audio_path.exists():
-                    duration = tts.generate(scene.narration, audio_path)
-                else:
-                    duration = tts.get_duration(audio_path)
-                scene_durations[scene.id] = duration
+                async with semaphore:
+                    cached_path, duration = await tts.generate_cached(scene.narration, cache_dir)
+                shutil.copyfile(cached_path, audio_dir / f"{scene.id}.mp3")
             else:
-                scene_durations[scene.id] = scene.duration or 3.0
+                duration = scene.duration or 3.0
             progress.advance(task)
+            return duration
+        
+        async def generate_and_record():
+            pending = {s.id: asyncio.ensure_future(scene_duration(s)) for s in scenes}
+            if parallel:
+                # Segment cache keys need every duration up front
+                await asyncio.gather(*pending.values())
+                durations = {scene_id: t.result() for scene_id, t in pending.items()}
+                result = await recorder.record_parallel_async(
+                    scenes, durations, on_scene_start=on_scene_start
+                )
+            else:
+                # The browser plays scene k while later narrations are still
+                # being synthesized; each scene awaits its own audio
+                result = await recorder.record_async(
+                    scenes, pending, on_scene_start=on_scene_start
+                )
+            return {scene_id: t.result() for scene_id, t in pending.items()}, result
+        
+        scene_durations, result = asyncio.run(generate_and_record())
     
     total_audio = sum(scene_durations.values())
     console.print(f"   ✅ Total audio duration: {total_audio:.1f}s")
-    
-    # Record video
-    console.print("\n[bold]3. Recording video...[/bold]")
-    recorder = VideoRecorder(
-        output_dir=output_dir,
-        resolution=(width, height),
-        headless=headless,
-    )
-    
-    def on_scene_start(scene_id, index):
-        console.print(f"   📍 Scene {index}/{len(script_data.scenes)}: {scene_id}")
-    
-    result = recorder.record(
-        scenes=script_data.scenes,
-        scene_durations=scene_durations,
-        on_scene_start=on_scene_start,
-    )
     console.print(f"   ✅ Recorded {result.total_duration:.1f}s")
     
     # Merge video and audio
-    console.print("\n[bold]4. Merging video and audio...[/bold]")
+    console.print("\n[bold]3. Merging video and audio...[/bold]")
     merger = VideoMerger(
         fps=script_data.project.fps,
         bitrate=script_data.project.bitrate,
@@ -114,8 +140,8 @@ def generate(script, output, audio_dir, resolution, voice, headless):
     console.print(f"   ✅ Video saved: {output_path}")
     
     # Generate subtitles
-    console.print("\n[bold]5. Generating subtitles...[/bold]")
-    narrations = {s.id: s.narration for s in script_data.scenes if s.narration}
+    console.print("\n[bold]4. Generating subtitles...[/bold]")
+    narrations = {s.id: s.narration for s in scenes if s.narration}
     srt_path = output_path.with_suffix(".srt")
     merger.generate_srt(result.timestamps, narrations, srt_path)
     console.print(f"   ✅ Subtitles saved: {srt_path}")
@@ -138,17 +164,18 @@ def audio(script, output, voice):
     output_dir.mkdir(parents=True, exist_ok=True)
     
     tts = TTSEngine(voice=voice)
-    total_duration = 0
+    narrated = [s for s in script_data.scenes if s.narration]
+    audio_paths = [output_dir / f"{s.id}.mp3" for s in narrated]
     
-    for scene in script_data.scenes:
-        if scene.narration:
-            audio_path = output_dir / f"{scene.id}.mp3"
-            console.print(f"   Generating: {scene.id}")
-            duration = tts.generate(scene.narration, audio_path)
-            total_duration += duration
-            console.print(f"   ✅ {audio_path} ({duration:.1f}s)")
+    console.print(f"   Generating {len(narrated)} narrations...")
+    durations = tts.generate_many_sync(
+        [(s.narration, p) for s, p in zip(narrated, audio_paths)],
+        concurrency=TTS_CONCURRENCY,
+    )
+    for audio_path, duration in zip(audio_paths, durations):
+        console.print(f"   ✅ {audio_path} ({duration:.1f}s)")
     
-    console.print(f"\n[bold green]✅ Total: {total_duration:.1f}s[/bold green]")
+    console.print(f"\n[bold green]✅ Total: {sum(durations):.1f}s[/bold green]")
 
 
 @cli.command()
@@ -220,5 +247,49 @@ def voices(language):
         console.print(f"  {v['ShortName']} - {v['Locale']} ({v['Gender']})")
 
 
+
+@cli.command()
+@click.argument("urls", nargs=-1, required=True)
+@click.option("--output", "-o", default="./output/scripts", help="Script output directory")
+@click.option("--video-length", default=60, help="Target video length in seconds")
+@click.option("--style", default="professional", help="Narration style")
+@click.option("--language", default="zh-CN", help="Narration language")
+@click.option("--batch", is_flag=True, help="Submit prompts as one Anthropic Message Batch (half price, slower)")
+def scripts(urls, output, video_length, style, language, batch):
+    """Generate a script for each URL with Claude."""
+    import re
+    from ..core.ai_generator import close_clients, generate_scripts_bulk
+    from ..core.script import Script
+    
+    console.print(f"[bold blue]✍️ Generating {len(urls)} scripts[/bold blue]")
+    output_dir = Path(output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    async def run():
+        try:
+            return await generate_scripts_bulk(
+                list(urls),
+                use_batch_api=batch,
+                video_length=video_length,
+                style=style,
+                language=language,
+            )
+        finally:
+            await close_clients()
+    
+    results = asyncio.run(run())
+    
+    for url, result in results.items():
+        if not result["success"]:
+            console.print(f"   ❌ {url}: {result['error']}")
+            continue
+        name = re.sub(r"[^\w.-]+", "_", url.split("://", 1)[-1]).strip("_") or "script"
+        script_path = output_dir / f"{name}.yaml"
+        script_path.write_text(
+            ScriptParser.to_yaml(Script.from_dict(result["script"])), encoding="utf-8"
+        )
+        console.print(f"   ✅ {url} -> {script_path}")
+
+
 if __name__ == "__main__":
     cli()
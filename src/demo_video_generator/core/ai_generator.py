@@ -5,14 +5,178 @@ by analyzing website content and structure.
 """
 
 import asyncio
-from typing import Optional, Dict, Any, List
-from playwright.async_api import async_playwright
+import hashlib
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator, Union
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import anthropic
+import httpx
+import orjson
 import os
+import threading
+import yaml
+
+# libyaml C dumper when PyYAML was built with it
+try:
+    from yaml import CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
+
+
+_VOICE_MAP = {
+    "zh-CN": "zh-CN-XiaoxiaoNeural",
+    "en-US": "en-US-JennyNeural",
+    "ja-JP": "ja-JP-NanamiNeural"
+}
+
+# JSON Schema of the script; Claude fills it in through the emit_script tool
+_SCRIPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "project": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "resolution": {"type": "array", "items": {"type": "integer"}},
+                "fps": {"type": "integer"},
+                "voice": {"type": "string"},
+                "bitrate": {"type": "string"}
+            },
+            "required": ["name", "resolution", "fps", "voice", "bitrate"]
+        },
+        "scenes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "url": {"type": "string"},
+                    "narration": {"type": "string"},
+                    "actions": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "type": {
+                                    "enum": ["scroll", "scroll_to_text", "click", "wait", "goto"]
+                                },
+                                "y": {"type": "integer"},
+                                "smooth": {"type": "boolean"},
+                                "text": {"type": "string"},
+                                "offset": {"type": "integer"},
+                                "selector": {"type": "string"},
+                                "duration": {"type": "number"},
+                                "url": {"type": "string"}
+                            },
+                            "required": ["type"]
+                        }
+                    }
+                },
+                "required": ["id", "narration", "actions"]
+            }
+        }
+    },
+    "required": ["project", "scenes"]
+}
+
+_SCRIPT_TOOL = {
+    "name": "emit_script",
+    "description": "Emit the demo video script.",
+    "input_schema": _SCRIPT_SCHEMA
+}
+
+# Static instructions sent as the system prompt; per-site details go in the
+# user message. Together with the tool schema this is only ~450 tokens, below
+# Claude's 1024-token minimum for prompt caching, so it is not marked for it
+# and this path gets no prompt caching. Both generators follow the same rule:
+# mark a Claude prefix with cache_control only once it reaches the minimum.
+_SYSTEM_PROMPT = """你是一个专业的产品演示视频脚本编写专家。请根据用户提供的网站分析结果和视频要求，调用 emit_script 输出完整的演示视频分镜脚本。
+
+- project 的 resolution 和 voice 使用用户要求中的值
+- 3-5个场景：首个展示核心价值主张，中间展示关键功能，最后总结并号召行动
+- narration 简洁有力、自然流畅
+- actions 模拟真实用户浏览：scroll(y, smooth)、scroll_to_text(text, offset)、click(selector 或 text)、wait(duration)、goto(url)"""
+
+
+# CTA buttons: texts to look for per tag, matched case-insensitively like
+# Playwright's :has-text()
+_CTA_PATTERNS = {
+    "button": ["试用", "开始", "demo"],
+    "a": ["了解更多", "get started"],
+}
+_MAX_CTA_BUTTONS = 15
+
+# Page-side extraction of title, description, headings and CTA texts. CTA
+# candidates come from one "button, a" query in document order; repeated
+# labels (e.g. the same button in header and footer) are kept once.
+_EXTRACT_JS = """([ctaPatterns, maxCta]) => {
+    const texts = (elements) => elements.map(e => (e.textContent || "").trim()).filter(Boolean);
+    const meta = document.querySelector('meta[name="description"]');
+    const cta = new Set();
+    for (const e of document.querySelectorAll(Object.keys(ctaPatterns).join(","))) {
+        const text = (e.textContent || "").trim();
+        const lower = text.toLowerCase();
+        if (text && ctaPatterns[e.tagName.toLowerCase()].some(n => lower.includes(n))) {
+            cta.add(text);
+            if (cta.size >= maxCta) break;
+        }
+    }
+    return {
+        title: document.title,
+        description: (meta && meta.getAttribute("content")) || "",
+        h1: texts([...document.querySelectorAll("h1")]),
+        h2: texts([...document.querySelectorAll("h2")].slice(0, 5)),
+        cta: [...cta],
+    };
+}"""
+
+
+# Resource types the analysis never reads; only the HTML and scripts that
+# render text are loaded
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+
+async def _block_heavy_resources(route) -> None:
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
 
 
 class WebsiteAnalyzer:
-    """Analyze website content and structure for script generation."""
+    """Analyze website content and structure for script generation.
+
+    Use as an async context manager to share one Chromium instance across
+    several ``analyze`` calls; each call then only opens a new context.
+    Outside a ``with`` block every call launches its own browser.
+
+    When the site sends an ETag or Last-Modified header, analyses are
+    cached on disk under ``cache_dir`` keyed by URL and those validators,
+    so an unchanged page is not crawled again. Pass ``cache_dir=None`` to
+    disable the cache.
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = "output/.analysis_cache/http"):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._playwright = None
+        self._browser = None
+
+    async def __aenter__(self) -> "WebsiteAnalyzer":
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the shared browser, if one was started."""
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
 
     async def analyze(self, url: str) -> Dict[str, Any]:
         """Analyze website and extract key information.
@@ -29,80 +193,171 @@ class WebsiteAnalyzer:
             - cta_buttons: Call-to-action buttons
             - features: Detected features/benefits
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        cache_path = await self._cache_path(url) if self.cache_dir else None
+        if cache_path is not None:
+            try:
+                return orjson.loads(cache_path.read_bytes())
+            except (OSError, ValueError):
+                pass
+
+        if self._browser is not None:
+            analysis = await self._analyze_in(self._browser, url)
+        else:
+            # A browser local to this call, so concurrent calls outside
+            # ``async with`` don't share or close each other's
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True)
+                try:
+                    analysis = await self._analyze_in(browser, url)
+                finally:
+                    await browser.close()
+
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(orjson.dumps(analysis))
+
+        return analysis
+
+    async def _cache_path(self, url: str) -> Optional[Path]:
+        """Probe the page's validators and return its cache file path.
+
+        Returns None when the server sends neither ETag nor Last-Modified
+        (or can't be reached), in which case the page is always crawled.
+        """
+        try:
+            async with httpx.AsyncClient(follow_redirects=True, timeout=5.0) as client:
+                response = await client.head(url)
+        except httpx.HTTPError:
+            return None
+
+        etag = response.headers.get("etag", "")
+        last_modified = response.headers.get("last-modified", "")
+        if not response.is_success or not (etag or last_modified):
+            return None
 
+        key = hashlib.sha1(f"{url}\n{etag}\n{last_modified}".encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    async def _analyze_in(self, browser, url: str) -> Dict[str, Any]:
+        """Load the page in a fresh context of ``browser`` and extract the analysis."""
+        context = await browser.new_context()
+        await context.route("**/*", _block_heavy_resources)
+        page = await context.new_page()
+
+        try:
+            # Only static DOM is read, so don't wait for the network to go idle;
+            # give late scripts a short window to finish rendering
+            await page.goto(url, wait_until="domcontentloaded", timeout=15000)
             try:
-                await page.goto(url, wait_until="networkidle", timeout=30000)
-
-                # Extract page information
-                analysis = {
-                    "url": url,
-                    "title": await page.title(),
-                    "description": await page.locator('meta[name="description"]').get_attribute("content") or "",
-                    "headings": [],
-                    "sections": [],
-                    "cta_buttons": [],
-                    "features": []
-                }
-
-                # Extract headings (h1, h2)
-                h1_elements = await page.locator("h1").all()
-                for h1 in h1_elements:
-                    text = await h1.text_content()
-                    if text:
-                        analysis["headings"].append({"level": 1, "text": text.strip()})
-
-                h2_elements = await page.locator("h2").all()
-                for h2 in h2_elements[:5]:  # Limit to first 5
-                    text = await h2.text_content()
-                    if text:
-                        analysis["headings"].append({"level": 2, "text": text.strip()})
-
-                # Extract CTA buttons
-                button_selectors = [
-                    'button:has-text("试用")',
-                    'button:has-text("开始")',
-                    'a:has-text("了解更多")',
-                    'a:has-text("Get Started")',
-                    'button:has-text("Demo")'
-                ]
-
-                for selector in button_selectors:
-                    try:
-                        buttons = await page.locator(selector).all()
-                        for btn in buttons[:3]:
-                            text = await btn.text_content()
-                            if text:
-                                analysis["cta_buttons"].append(text.strip())
-                    except:
-                        pass
-
-                # Get page screenshot for context
-                screenshot = await page.screenshot(full_page=False)
-
-                # Get viewport dimensions for script generation
-                viewport = page.viewport_size
-                analysis["viewport"] = viewport
-
-            finally:
-                await browser.close()
-
-            return analysis
+                await page.wait_for_load_state("load", timeout=5000)
+            except PlaywrightTimeoutError:
+                pass
+
+            # Extract everything in one round trip to the page
+            data = await page.evaluate(_EXTRACT_JS, [_CTA_PATTERNS, _MAX_CTA_BUTTONS])
+
+            analysis = {
+                "url": url,
+                "title": data["title"],
+                "description": data["description"],
+                "headings": (
+                    [{"level": 1, "text": t} for t in data["h1"]]
+                    + [{"level": 2, "text": t} for t in data["h2"]]
+                ),
+                "sections": [],
+                "cta_buttons": data["cta"],
+                "features": []
+            }
+
+            # Get viewport dimensions for script generation
+            viewport = page.viewport_size
+            analysis["viewport"] = viewport
+
+        finally:
+            await context.close()
+
+        return analysis
+
+
+# One client per (API key, event loop), shared by all generators. httpx
+# connection pools are bound to the loop that opened them, so each
+# asyncio.run() or worker-thread loop gets its own client.
+_CLIENT_CACHE: Dict[Tuple[str, asyncio.AbstractEventLoop], anthropic.AsyncAnthropic] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def _get_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Return the Anthropic client for ``api_key`` on the running loop."""
+    loop = asyncio.get_running_loop()
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get((api_key, loop))
+        if client is None:
+            # Forget clients whose loop has finished; their pools are unusable
+            for key in [k for k in _CLIENT_CACHE if k[1].is_closed()]:
+                del _CLIENT_CACHE[key]
+            client = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                max_retries=2,
+                timeout=60.0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_keepalive_connections=32)
+                ),
+            )
+            _CLIENT_CACHE[(api_key, loop)] = client
+        return client
+
+
+async def close_clients() -> None:
+    """Close the clients opened on the running loop (call before it ends)."""
+    loop = asyncio.get_running_loop()
+    with _CLIENT_CACHE_LOCK:
+        keys = [k for k in _CLIENT_CACHE if k[1] is loop]
+        clients = [_CLIENT_CACHE.pop(k) for k in keys]
+    for client in clients:
+        await client.close()
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap local token estimate that errs on the high side.
+
+    Counts one token per CJK/non-ASCII character and per three ASCII
+    characters (URLs and JSON punctuation tokenize denser than prose),
+    plus 10% headroom; avoids a count_tokens round trip on every prompt.
+    """
+    ascii_chars = sum(1 for c in text if c < "\x80")
+    estimate = (len(text) - ascii_chars) + ascii_chars // 3
+    return estimate + estimate // 10 + 1
+
+
+# Progressively stricter truncations applied while the user prompt is over
+# budget: shorter headings, fewer CTA buttons, shorter description
+_TRUNCATION_STEPS = (
+    lambda a: {**a, "headings": [{**h, "text": h["text"][:80]} for h in a.get("headings", [])]},
+    lambda a: {**a, "cta_buttons": a.get("cta_buttons", [])[:10]},
+    lambda a: {**a, "description": (a.get("description") or "")[:300]},
+)
 
 
 class ScriptGenerator:
     """Generate demo video scripts using AI."""
 
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize with Anthropic API key."""
+    def __init__(self, api_key: Optional[str] = None, max_input_tokens: int = 2000):
+        """Initialize with Anthropic API key.
+
+        ``max_input_tokens`` bounds the per-site user message; oversized
+        site analyses are truncated to fit (see ``_fit_analysis``).
+        """
+        self.max_input_tokens = max_input_tokens
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable must be set")
-        self.client = anthropic.Anthropic(api_key=self.api_key)
 
-    def generate_script(
+    @property
+    def async_client(self) -> anthropic.AsyncAnthropic:
+        """Shared client for this API key on the running event loop."""
+        return _get_client(self.api_key)
+
+    async def generate_script(
         self,
         website_analysis: Dict[str, Any],
         user_requirements: Optional[Dict[str, Any]] = None
@@ -118,53 +373,176 @@ class ScriptGenerator:
                 - language: 'zh-CN', 'en-US', etc (default: 'zh-CN')
 
         Returns:
-            Complete script in YAML format
+            Complete script as a dictionary
         """
         requirements = user_requirements or {}
-        video_length = requirements.get("video_length", 60)
-        style = requirements.get("style", "professional")
-        language = requirements.get("language", "zh-CN")
-        focus_areas = requirements.get("focus_areas", [])
-
-        # Build prompt for Claude
-        prompt = self._build_prompt(website_analysis, requirements)
-
-        # Call Claude API
-        message = self.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4096,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
 
-        # Extract YAML script from response
-        script_yaml = message.content[0].text
+        # Stream the response so long generations don't hit the HTTP read
+        # timeout; the SDK assembles the forced tool call's input as it goes
+        async with self.async_client.messages.stream(
+            **self._message_params(website_analysis, requirements)
+        ) as stream:
+            message = await stream.get_final_message()
 
-        # Parse and validate
-        import yaml
-        try:
-            script_data = yaml.safe_load(script_yaml)
-            return script_data
-        except yaml.YAMLError as e:
-            raise ValueError(f"Failed to parse generated script: {e}")
+        return self._script_from_message(message)
 
-    def _build_prompt(self, analysis: Dict[str, Any], requirements: Dict[str, Any]) -> str:
-        """Build prompt for Claude to generate script."""
+    async def stream_scenes(
+        self,
+        website_analysis: Dict[str, Any],
+        user_requirements: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each scene of the generated script as soon as it is complete.
 
-        video_length = requirements.get("video_length", 60)
-        style = requirements.get("style", "professional")
-        language = requirements.get("language", "zh-CN")
+        The SDK parses the streamed tool input incrementally; a scene is
+        complete once the next one appears in the snapshot, so downstream
+        work such as TTS can begin while Claude is still writing later
+        scenes.
+        """
+        requirements = user_requirements or {}
+        emitted = 0
+
+        async with self.async_client.messages.stream(
+            **self._message_params(website_analysis, requirements)
+        ) as stream:
+            async for event in stream:
+                if event.type != "input_json":
+                    continue
+                scenes = (event.snapshot or {}).get("scenes") or []
+                while emitted < len(scenes) - 1:
+                    yield scenes[emitted]
+                    emitted += 1
+
+            message = await stream.get_final_message()
+
+        for scene in self._script_from_message(message)["scenes"][emitted:]:
+            yield scene
+
+    async def generate_scripts(
+        self,
+        analyses: List[Dict[str, Any]],
+        user_requirements: Optional[Dict[str, Any]] = None,
+        use_batch_api: bool = False,
+        concurrency: int = 8,
+        poll_interval: float = 10.0
+    ) -> List[Dict[str, Any]]:
+        """Generate scripts for several analyses at once.
+
+        By default requests run concurrently on the async client, at most
+        ``concurrency`` at a time. With ``use_batch_api`` all prompts are
+        submitted as one Message Batch and polled every ``poll_interval``
+        seconds; batches cost half as much but may take minutes to finish.
+
+        Returns:
+            One result per analysis, in order: ``{"script": ..., "success": True}``
+            or ``{"error": ..., "success": False}``
+        """
+        requirements = user_requirements or {}
+        params = [self._message_params(a, requirements) for a in analyses]
+
+        if use_batch_api:
+            messages = await self._run_batch(params, poll_interval)
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def call(p: Dict[str, Any]):
+                async with semaphore:
+                    return await self.async_client.messages.create(**p)
+
+            messages = await asyncio.gather(*[call(p) for p in params], return_exceptions=True)
+
+        results = []
+        for message in messages:
+            if isinstance(message, BaseException):
+                results.append({"error": str(message), "success": False})
+                continue
+            try:
+                script = self._script_from_message(message)
+                results.append({"script": script, "success": True})
+            except ValueError as e:
+                results.append({"error": str(e), "success": False})
+
+        return results
 
-        voice_map = {
-            "zh-CN": "zh-CN-XiaoxiaoNeural",
-            "en-US": "en-US-JennyNeural",
-            "ja-JP": "ja-JP-NanamiNeural"
+    async def _run_batch(
+        self,
+        params: List[Dict[str, Any]],
+        poll_interval: float
+    ) -> List[Any]:
+        """Submit one Message Batch and return each response message or error."""
+        batches = self.async_client.messages.batches
+
+        batch = await batches.create(requests=[
+            {"custom_id": f"site-{i}", "params": p} for i, p in enumerate(params)
+        ])
+        while batch.processing_status != "ended":
+            await asyncio.sleep(poll_interval)
+            batch = await batches.retrieve(batch.id)
+
+        messages: List[Any] = [RuntimeError("Missing batch result")] * len(params)
+        async for entry in await batches.results(batch.id):
+            index = int(entry.custom_id.split("-", 1)[1])
+            if entry.result.type == "succeeded":
+                messages[index] = entry.result.message
+            else:
+                messages[index] = RuntimeError(f"Batch request {entry.result.type}")
+        return messages
+
+    def _message_params(
+        self,
+        analysis: Dict[str, Any],
+        requirements: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build ``messages.create`` arguments for one analysis."""
+        system_prompt, user_prompt = self._build_prompt(analysis, requirements)
+
+        return {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": 4096,
+            "system": system_prompt,
+            "messages": [
+                {"role": "user", "content": user_prompt}
+            ],
+            "tools": [_SCRIPT_TOOL],
+            "tool_choice": {"type": "tool", "name": _SCRIPT_TOOL["name"]}
         }
 
-        prompt = f"""你是一个专业的产品演示视频脚本编写专家。请根据以下网站分析结果，生成一个完整的演示视频分镜脚本。
+    @staticmethod
+    def _script_from_message(message) -> Dict[str, Any]:
+        """Return the script Claude passed to the emit_script tool."""
+        for block in message.content:
+            if block.type == "tool_use" and block.name == _SCRIPT_TOOL["name"]:
+                return block.input
+        raise ValueError("Claude did not return a script")
 
-网站信息：
+    def _build_prompt(
+        self,
+        analysis: Dict[str, Any],
+        requirements: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        """Build the (system, user) prompt pair for Claude.
+
+        The system part is the static ``_SYSTEM_PROMPT``; everything that
+        varies per call goes into the user part.
+        """
+
+        user_prompt = self._render_user_prompt(analysis, requirements)
+        for truncate in _TRUNCATION_STEPS:
+            if _estimate_tokens(user_prompt) <= self.max_input_tokens:
+                break
+            analysis = truncate(analysis)
+            user_prompt = self._render_user_prompt(analysis, requirements)
+
+        return _SYSTEM_PROMPT, user_prompt
+
+    @staticmethod
+    def _render_user_prompt(analysis: Dict[str, Any], requirements: Dict[str, Any]) -> str:
+        """Render the per-site user message."""
+
+        video_length = requirements.get("video_length", 60)
+        style = requirements.get("style", "professional")
+        language = requirements.get("language", "zh-CN")
+
+        return f"""网站信息：
 - URL: {analysis['url']}
 - 标题: {analysis['title']}
 - 描述: {analysis.get('description', '无')}
@@ -176,58 +554,14 @@ class ScriptGenerator:
 - 风格: {style}
 - 语言: {language}
 - 分辨率: 1920x1080
-
-请生成一个YAML格式的分镜脚本，包含：
-1. project配置（name, resolution, fps, voice, bitrate）
-2. 3-5个精心设计的场景（scenes），每个场景包含：
-   - id: 场景唯一标识
-   - url: 要访问的URL（可选，如果切换页面）
-   - narration: 旁白文字（自然、流畅、吸引人）
-   - actions: 具体的浏览器操作（滚动、点击、等待等）
-
-场景设计原则：
-- 第一个场景：展示首页核心价值主张
-- 中间场景：展示关键功能/特色
-- 最后场景：总结和号召行动
-- 每个场景的narration要简洁有力，突出重点
-- actions要合理，模拟真实用户浏览行为
-
-可用的action类型：
-- scroll: 滚动页面 (参数: y, smooth)
-- scroll_to_text: 滚动到包含特定文本的元素 (参数: text, offset)
-- click: 点击元素 (参数: selector 或 text)
-- wait: 等待 (参数: duration)
-- goto: 访问新URL (参数: url)
-
-请直接输出YAML格式的脚本，不要有其他说明文字：
-
-```yaml
-project:
-  name: "产品演示视频"
-  resolution: [1920, 1080]
-  fps: 30
-  voice: "{voice_map.get(language, 'zh-CN-XiaoxiaoNeural')}"
-  bitrate: "8000k"
-
-scenes:
-  - id: "scene_01"
-    url: "{analysis['url']}"
-    narration: "..."
-    actions:
-      - type: scroll
-        y: 0
-      - type: wait
-        duration: 2
-```
-
-请确保生成完整、可执行的脚本。"""
-
-        return prompt
+- 配音 voice: {_VOICE_MAP.get(language, 'zh-CN-XiaoxiaoNeural')}
+- 第一个场景的 url: {analysis['url']}"""
 
 
 async def generate_demo_script(
     url: str,
     api_key: Optional[str] = None,
+    analyzer: Optional[WebsiteAnalyzer] = None,
     **requirements
 ) -> Dict[str, Any]:
     """Convenience function to analyze website and generate script.
@@ -235,22 +569,75 @@ async def generate_demo_script(
     Args:
         url: Website URL
         api_key: Anthropic API key (or set ANTHROPIC_API_KEY env var)
+        analyzer: Optional open analyzer whose browser should be reused
         **requirements: Additional requirements (video_length, style, etc)
 
     Returns:
         Generated script as dictionary
     """
+    # Check the API key before spending time on the crawl
+    generator = ScriptGenerator(api_key)
+
     # Analyze website
-    analyzer = WebsiteAnalyzer()
+    analyzer = analyzer or WebsiteAnalyzer()
     analysis = await analyzer.analyze(url)
 
     # Generate script
-    generator = ScriptGenerator(api_key)
-    script = generator.generate_script(analysis, requirements)
+    script = await generator.generate_script(analysis, requirements)
 
     return script
 
 
+async def generate_scripts_bulk(
+    urls: List[str],
+    api_key: Optional[str] = None,
+    use_batch_api: bool = False,
+    crawl_concurrency: int = 4,
+    **requirements
+) -> Dict[str, Dict[str, Any]]:
+    """Analyze several websites and generate a script for each.
+
+    Args:
+        urls: Website URLs; duplicates are analyzed once
+        api_key: Anthropic API key (or set ANTHROPIC_API_KEY env var)
+        use_batch_api: Submit all prompts as one Anthropic Message Batch
+        crawl_concurrency: Maximum pages open in the browser at once
+        **requirements: Additional requirements (video_length, style, etc)
+
+    Returns:
+        Dictionary mapping each URL to ``{"script": ..., "success": True}``
+        or ``{"error": ..., "success": False}``; a URL whose analysis fails
+        gets an error entry without affecting the others
+    """
+    urls = list(dict.fromkeys(urls))
+    semaphore = asyncio.Semaphore(crawl_concurrency)
+
+    async with WebsiteAnalyzer() as analyzer:
+        async def analyze(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await analyzer.analyze(url)
+
+        analyses = await asyncio.gather(*[analyze(url) for url in urls], return_exceptions=True)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    analyzed: Dict[str, Dict[str, Any]] = {}
+    for url, analysis in zip(urls, analyses):
+        if isinstance(analysis, BaseException):
+            results[url] = {"error": str(analysis), "success": False}
+        else:
+            analyzed[url] = analysis
+
+    if analyzed:
+        generator = ScriptGenerator(api_key)
+        scripts = await generator.generate_scripts(
+            list(analyzed.values()), requirements, use_batch_api=use_batch_api
+        )
+        results.update(zip(analyzed, scripts))
+
+    # Same order as the input
+    return {url: results[url] for url in urls}
+
+
 # CLI for testing
 if __name__ == "__main__":
     import sys
@@ -262,9 +649,11 @@ if __name__ == "__main__":
     url = sys.argv[1]
 
     async def main():
-        script = await generate_demo_script(url)
+        try:
+            script = await generate_demo_script(url)
+        finally:
+            await close_clients()
 
-        import yaml
-        print(yaml.dump(script, allow_unicode=True, sort_keys=False))
+        print(yaml.dump(script, Dumper=_YamlDumper, allow_unicode=True, sort_keys=False))
 
     asyncio.run(main())
@@ -9,189 +9,477 @@ Supports multiple AI providers:
 """
 
 import asyncio
+import copy
+import functools
+import hashlib
+import json
 import os
-from typing import Optional, Dict, Any, List, Literal
-from playwright.async_api import async_playwright
-import anthropic
-from openai import AsyncOpenAI
-import httpx
+import re
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Literal, Callable, Tuple, AsyncIterator, TYPE_CHECKING
+import orjson
 import yaml
 
+# libyaml C bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+# Provider SDKs, httpx and Playwright are imported where first used, so a
+# process only pays for the ones its provider needs
+if TYPE_CHECKING:
+    import httpx
+
 
 ModelProvider = Literal["claude", "deepseek", "minimax", "gemini", "gpt"]
 
+# Body of the first markdown code block; an unclosed block runs to the end
+_FENCE_RE = re.compile(r"```(?:ya?ml)?[ \t]*\n?(.*?)(?:```|\Z)", re.DOTALL | re.IGNORECASE)
+
+
+def _canonical_key(data: Dict[str, Any]) -> str:
+    """Serialize a dict into a stable string usable as a cache key."""
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+
+
+PromptBuilder = Callable[[Dict[str, Any], Dict[str, Any]], Tuple[str, str]]
+
+
+def _memoize_prompt(builder: PromptBuilder) -> PromptBuilder:
+    """Cache prompt builder output by the canonical form of its inputs.
+
+    Analysis and requirements dicts are unhashable, so they are serialized
+    with sorted keys first; identical inputs then return the cached prompt
+    without re-rendering the template.
+    """
+
+    @functools.lru_cache(maxsize=128)
+    def _build(analysis_key: str, requirements_key: str) -> Tuple[str, str]:
+        return builder(json.loads(analysis_key), json.loads(requirements_key))
+
+    @functools.wraps(builder)
+    def wrapper(analysis: Dict[str, Any], requirements: Dict[str, Any]) -> Tuple[str, str]:
+        return _build(_canonical_key(analysis), _canonical_key(requirements))
+
+    wrapper.cache_info = _build.cache_info
+    wrapper.cache_clear = _build.cache_clear
+    return wrapper
+
+
+# Connection pool shared by every provider call on an event loop, so
+# repeated and parallel requests reuse warm TLS/HTTP2 connections. httpx
+# pools are bound to the loop that opened them, hence one per loop.
+_http_clients: Dict[asyncio.AbstractEventLoop, "httpx.AsyncClient"] = {}
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """Return the running loop's shared HTTP client, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        import httpx
+
+        # Forget pools whose loop has finished; they can't be used again
+        for dead in [l for l in _http_clients if l.is_closed()]:
+            del _http_clients[dead]
+        client = _http_clients[loop] = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the running loop's shared HTTP client (call on shutdown)."""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# Analyses shared by all WebsiteAnalyzer instances in this process, least
+# recently used first: "url|max_sections" -> (fetched_at, analysis)
+_analysis_memory: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+_ANALYSIS_MEMORY_MAX = 256
+# Locks of crawls in progress; each is dropped once its crawl finishes
+_analysis_locks: Dict[str, asyncio.Lock] = {}
+
+
+_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+
+_CTA_TEXT_RE = re.compile("开始|试用|立即|免费|Demo|Start|Try|Free", re.IGNORECASE)
+_CTA_HREF_KEYWORDS = ("trial", "demo", "start")
+
+# CSS and text patterns in one Playwright selector, resolved in a single call
+_CTA_SELECTOR = (
+    'button, a[href*="trial"], a[href*="demo"], a[href*="start"], '
+    f':text-matches("{_CTA_TEXT_RE.pattern}", "i")'
+)
+_CTA_EXTRACT_JS = "els => els.slice(0, 10).map(e => (e.textContent || '').trim().slice(0, 50))"
+
+# Page-side extraction of everything the analysis needs except the CTA
+# buttons (which need Playwright's selector engine), in one round trip
+_EXTRACT_JS = """(maxSections) => {
+    const texts = (selector, limit) => [...document.querySelectorAll(selector)]
+        .slice(0, limit)
+        .map(e => (e.textContent || "").trim());
+    const meta = document.querySelector('meta[name="description"]');
+    return {
+        title: document.title,
+        description: (meta && meta.getAttribute("content")) || "",
+        h1: texts("h1", 3).filter(Boolean).map(t => t.slice(0, 200)),
+        h2: texts("h2", maxSections).filter(Boolean).map(t => t.slice(0, 200)),
+        sections: texts("p", 10).filter(t => t.length > 20).map(t => t.slice(0, 300)),
+        page_height: document.documentElement.scrollHeight,
+    };
+}"""
+
+
+class _StaticPageParser(HTMLParser):
+    """Collect the ``_EXTRACT_JS`` fields from server-rendered HTML."""
+
+    _CAPTURED = {"title", "h1", "h2", "p", "button", "a"}
+    _SKIPPED = {"script", "style", "noscript", "template"}
+    # Start tags that implicitly close an open <p>, as browsers do
+    _CLOSES_P = {
+        "p", "div", "section", "article", "aside", "header", "footer", "nav",
+        "main", "form", "ul", "ol", "table", "h1", "h2", "h3", "h4", "h5", "h6",
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.description = ""
+        self.elements: List[Tuple[str, Dict[str, str], List[str]]] = []
+        self._open: List[Tuple[str, Dict[str, str], List[str]]] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED:
+            self._skip_depth += 1
+        elif tag == "meta":
+            attrs = dict(attrs)
+            if (attrs.get("name") or "").lower() == "description":
+                self.description = attrs.get("content") or ""
+        else:
+            if tag in self._CLOSES_P:
+                self.handle_endtag("p")
+            if tag not in self._CAPTURED:
+                return
+            element = (tag, {k: v or "" for k, v in attrs}, [])
+            self.elements.append(element)
+            self._open.append(element)
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i][0] == tag:
+                del self._open[i:]
+                break
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            for _, _, parts in self._open:
+                parts.append(data)
+
+    def texts(self, tag: str) -> List[str]:
+        return [" ".join("".join(parts).split()) for t, _, parts in self.elements if t == tag]
+
+    def cta_texts(self) -> List[str]:
+        texts = []
+        for tag, attrs, parts in self.elements:
+            if tag not in ("button", "a"):
+                continue
+            text = " ".join("".join(parts).split())
+            href = attrs.get("href", "")
+            if (
+                tag == "button"
+                or any(k in href for k in _CTA_HREF_KEYWORDS)
+                or _CTA_TEXT_RE.search(text)
+            ):
+                texts.append(text[:50])
+        return texts[:10]
+
+
+def _build_analysis(url: str, data: Dict[str, Any], cta_texts: List[str]) -> Dict[str, Any]:
+    """Assemble an analysis from extracted page fields and CTA texts."""
+    analysis = {
+        "url": url,
+        "title": data["title"],
+        "description": data["description"],
+        "headings": (
+            [{"level": 1, "text": t} for t in data["h1"]]
+            + [{"level": 2, "text": t} for t in data["h2"]]
+        ),
+        "sections": data["sections"],
+        "cta_buttons": [],
+        "features": [],
+        "images": [],
+        "page_structure": {}
+    }
+
+    # CTA buttons, deduplicated in page order
+    seen = set()
+    for btn_text in cta_texts:
+        if btn_text and btn_text not in seen:
+            seen.add(btn_text)
+            analysis["cta_buttons"].append(btn_text)
+
+    # Get viewport info
+    analysis["viewport"] = {"width": 1920, "height": 1080}
+
+    # Get page height for scroll planning
+    analysis["page_height"] = data["page_height"] or 3000
+
+    return analysis
+
 
 class WebsiteAnalyzer:
-    """Analyze website content and structure for script generation."""
+    """Analyze website content and structure for script generation.
+
+    Results are cached per URL in memory and on disk for ``cache_ttl``
+    seconds, so comparing several providers on one site crawls it once.
+    Pass ``cache_dir=None`` to disable the disk cache.
+
+    Use as an async context manager to keep one Chromium instance for all
+    crawls; it is launched on the first cache miss and each crawl then only
+    opens a new context. Outside a ``with`` block every crawl launches its
+    own browser.
 
-    async def analyze(self, url: str, max_sections: int = 5) -> Dict[str, Any]:
+    Server-rendered pages are read with a plain HTTP GET first; Chromium is
+    only started when that yields no headings or paragraphs. Pass
+    ``static_fast_path=False`` to always render the page.
+
+    Rendered pages are read once the DOM is parsed and main content is
+    present. Pass ``wait_for_js=True`` for sites that only fill in their
+    content after hydration; this waits for network idle instead and
+    implies rendering.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str | Path] = "output/.analysis_cache",
+        cache_ttl: float = 300.0,
+        static_fast_path: bool = True,
+        wait_for_js: bool = False,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_ttl = cache_ttl
+        self.static_fast_path = static_fast_path and not wait_for_js
+        self.wait_for_js = wait_for_js
+        self._playwright = None
+        self._browser = None
+        self._keep_browser = False
+        self._browser_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "WebsiteAnalyzer":
+        self._keep_browser = True
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._keep_browser = False
+        await self.close()
+
+    async def _get_browser(self):
+        """Return the shared browser, launching it on first use."""
+        async with self._browser_lock:
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+            return self._browser
+
+    async def close(self) -> None:
+        """Close the shared browser, if one was started."""
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def analyze(
+        self,
+        url: str,
+        max_sections: int = 5,
+        force_refresh: bool = False
+    ) -> Dict[str, Any]:
         """Analyze website and extract key information.
 
         Args:
             url: Website URL to analyze
             max_sections: Maximum number of sections to extract
+            force_refresh: Crawl again even if a fresh cached analysis exists
 
         Returns:
             Dictionary containing site structure and content
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-            )
-            page = await context.new_page()
+        key = f"{url}|{max_sections}"
 
+        cached = None if force_refresh else self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        # Concurrent misses for the same URL wait for a single crawl
+        lock = _analysis_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                cached = None if force_refresh else self._cache_get(key)
+                if cached is not None:
+                    return cached
+
+                analysis = None
+                if self.static_fast_path:
+                    analysis = await self._try_static(url, max_sections)
+                if analysis is None:
+                    analysis = await self._crawl(url, max_sections)
+                self._cache_put(key, analysis)
+                return analysis
+        finally:
+            # Callers already waiting keep their reference and then hit the cache
+            if _analysis_locks.get(key) is lock:
+                del _analysis_locks[key]
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached analysis from memory or disk, if any."""
+        now = time.time()
+
+        entry = _analysis_memory.get(key)
+        if entry and now - entry[0] < self.cache_ttl:
+            _analysis_memory.move_to_end(key)
+            # Callers may annotate the analysis; keep the shared copy intact
+            return copy.deepcopy(entry[1])
+
+        if self.cache_dir:
+            path = self._cache_path(key)
             try:
-                await page.goto(url, wait_until="networkidle", timeout=30000)
+                data = orjson.loads(path.read_bytes())
+            except (OSError, ValueError):
+                return None
+            if now - data["fetched_at"] < self.cache_ttl:
+                self._remember(key, data["fetched_at"], data["analysis"])
+                return data["analysis"]
+
+        return None
+
+    def _remember(self, key: str, fetched_at: float, analysis: Dict[str, Any]):
+        """Store a private copy of an analysis, evicting expired and least-used ones."""
+        _analysis_memory[key] = (fetched_at, copy.deepcopy(analysis))
+        _analysis_memory.move_to_end(key)
+
+        expired = [k for k, (t, _) in _analysis_memory.items() if fetched_at - t >= self.cache_ttl]
+        for k in expired:
+            del _analysis_memory[k]
+        while len(_analysis_memory) > _ANALYSIS_MEMORY_MAX:
+            _analysis_memory.popitem(last=False)
+
+    def _cache_put(self, key: str, analysis: Dict[str, Any]):
+        fetched_at = time.time()
+        self._remember(key, fetched_at, analysis)
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._cache_path(key).write_bytes(
+                orjson.dumps({"fetched_at": fetched_at, "analysis": analysis})
+            )
 
-                # Wait a bit for dynamic content
-                await page.wait_for_timeout(2000)
-
-                # Extract comprehensive page information
-                analysis = {
-                    "url": url,
-                    "title": await page.title(),
-                    "description": "",
-                    "headings": [],
-                    "sections": [],
-                    "cta_buttons": [],
-                    "features": [],
-                    "images": [],
-                    "page_structure": {}
-                }
-
-                # Meta description
-                try:
-                    desc = await page.locator('meta[name="description"]').get_attribute("content")
-                    analysis["description"] = desc or ""
-                except:
-                    pass
+    async def _try_static(self, url: str, max_sections: int) -> Optional[Dict[str, Any]]:
+        """Analyze the raw HTML, or return None if the page needs rendering."""
+        import httpx
 
-                # Extract main heading
-                try:
-                    h1_elements = await page.locator("h1").all()
-                    for h1 in h1_elements[:3]:
-                        text = await h1.text_content()
-                        if text and len(text.strip()) > 0:
-                            analysis["headings"].append({
-                                "level": 1,
-                                "text": text.strip()[:200]
-                            })
-                except:
-                    pass
+        try:
+            response = await get_http_client().get(
+                url,
+                headers={"User-Agent": _USER_AGENT},
+                follow_redirects=True,
+                timeout=10.0,
+            )
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200 or "text/html" not in response.headers.get("content-type", ""):
+            return None
+
+        parser = _StaticPageParser()
+        parser.feed(response.text)
+        parser.close()
+
+        data = {
+            "title": " ".join(parser.texts("title")[:1]),
+            "description": parser.description,
+            "h1": [t[:200] for t in parser.texts("h1") if t][:3],
+            "h2": [t[:200] for t in parser.texts("h2")[:max_sections] if t],
+            "sections": [t[:300] for t in parser.texts("p")[:10] if len(t) > 20],
+            "page_height": None,
+        }
+        if not (data["h1"] or data["h2"]) or not data["sections"]:
+            return None
 
-                # Extract subheadings
-                try:
-                    h2_elements = await page.locator("h2").all()
-                    for h2 in h2_elements[:max_sections]:
-                        text = await h2.text_content()
-                        if text and len(text.strip()) > 0:
-                            analysis["headings"].append({
-                                "level": 2,
-                                "text": text.strip()[:200]
-                            })
-                except:
-                    pass
+        return _build_analysis(url, data, parser.cta_texts())
 
-                # Extract sections/paragraphs for context
-                try:
-                    paragraphs = await page.locator("p").all()
-                    for p in paragraphs[:10]:
-                        text = await p.text_content()
-                        if text and len(text.strip()) > 20:
-                            analysis["sections"].append(text.strip()[:300])
-                except:
-                    pass
+    async def _crawl(self, url: str, max_sections: int) -> Dict[str, Any]:
+        """Load the page in Chromium and extract the analysis."""
+        if self._keep_browser:
+            return await self._crawl_in(await self._get_browser(), url, max_sections)
 
-                # CTA buttons
-                button_patterns = [
-                    'button, a[href*="trial"], a[href*="demo"], a[href*="start"]',
-                    'text=/开始|试用|立即|免费|Demo|Start|Try|Free/i'
-                ]
-
-                for pattern in button_patterns:
-                    try:
-                        elements = await page.locator(pattern).all()
-                        for elem in elements[:5]:
-                            text = await elem.text_content()
-                            if text and len(text.strip()) > 0:
-                                btn_text = text.strip()[:50]
-                                if btn_text not in analysis["cta_buttons"]:
-                                    analysis["cta_buttons"].append(btn_text)
-                    except:
-                        pass
-
-                # Get viewport info
-                analysis["viewport"] = {"width": 1920, "height": 1080}
-
-                # Get page height for scroll planning
-                try:
-                    page_height = await page.evaluate("document.documentElement.scrollHeight")
-                    analysis["page_height"] = page_height
-                except:
-                    analysis["page_height"] = 3000
+        from playwright.async_api import async_playwright
 
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                return await self._crawl_in(browser, url, max_sections)
             finally:
-                await context.close()
                 await browser.close()
 
-            return analysis
-
-
-class PromptOptimizer:
-    """Optimized prompts for different AI models."""
-
-    @staticmethod
-    def build_claude_prompt(
-        analysis: Dict[str, Any],
-        requirements: Dict[str, Any]
-    ) -> str:
-        """Claude-optimized prompt with detailed instructions."""
-
-        video_length = requirements.get("video_length", 60)
-        style = requirements.get("style", "professional")
-        language = requirements.get("language", "zh-CN")
-
-        voice_map = {
-            "zh-CN": "zh-CN-XiaoxiaoNeural",
-            "zh-TW": "zh-TW-HsiaoChenNeural",
-            "en-US": "en-US-JennyNeural",
-            "ja-JP": "ja-JP-NanamiNeural",
-        }
-
-        style_guide = {
-            "professional": "专业、权威、重点突出产品价值",
-            "casual": "轻松、友好、贴近用户日常使用场景",
-            "energetic": "活力、激情、强调创新和突破"
-        }
-
-        headings_text = "\n".join([f"  - {h['text']}" for h in analysis.get('headings', [])[:8]])
-        sections_text = "\n".join([f"  - {s[:150]}" for s in analysis.get('sections', [])[:5]])
-
-        prompt = f"""你是一位顶尖的产品演示视频脚本专家，专注于为 SaaS 产品创作高转化率的演示视频脚本。
+    async def _crawl_in(self, browser, url: str, max_sections: int) -> Dict[str, Any]:
+        """Crawl ``url`` in a fresh context of ``browser``."""
+        context = await browser.new_context(
+            viewport={"width": 1920, "height": 1080},
+            user_agent=_USER_AGENT
+        )
+        page = await context.new_page()
 
-## 网站分析结果
+        try:
+            if self.wait_for_js:
+                await page.goto(url, wait_until="networkidle", timeout=30000)
+            else:
+                # Analytics and chat widgets keep the network busy long
+                # after the content we read is in the DOM
+                await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+                try:
+                    await page.locator("h1, main, [role=main]").first.wait_for(timeout=3000)
+                except Exception:
+                    pass
 
-**URL**: {analysis['url']}
-**标题**: {analysis.get('title', 'N/A')}
-**描述**: {analysis.get('description', 'N/A')}
+            # Page fields and CTA buttons are independent reads; issue both
+            # at once so they share one round trip
+            data, cta_texts = await asyncio.gather(
+                page.evaluate(_EXTRACT_JS, max_sections),
+                page.locator(_CTA_SELECTOR).evaluate_all(_CTA_EXTRACT_JS),
+                return_exceptions=True,
+            )
+            if isinstance(data, BaseException):
+                raise data
+            if isinstance(cta_texts, BaseException):
+                cta_texts = []
 
-**主要内容结构**:
-{headings_text}
+        finally:
+            await context.close()
 
-**核心信息**:
-{sections_text}
+        return _build_analysis(url, data, cta_texts)
 
-**行动号召**: {', '.join(analysis.get('cta_buttons', [])[:5])}
 
-## 脚本要求
+_CLAUDE_SYSTEM_PROMPT = """你是一位顶尖的产品演示视频脚本专家，专注于为 SaaS 产品创作高转化率的演示视频脚本。
 
-- **视频时长**: {video_length}秒
-- **叙事风格**: {style_guide.get(style, '专业')}
-- **语言**: {language}
-- **分辨率**: 1920x1080 (16:9)
-- **目标**: 在{video_length}秒内清晰展示产品核心价值，引导用户行动
+用户会提供网站分析结果和脚本要求，请据此生成脚本。
 
 ## 输出格式
 
@@ -202,19 +490,19 @@ class PromptOptimizer:
 
 ### 场景设计原则
 
-**开场场景** (0-15秒):
+**开场场景** (约前 25% 时长):
 - 快速建立产品认知
 - 一句话价值主张
 - 展示首屏核心信息
 - Action: scroll y:0, wait 2-3秒
 
-**功能展示** (15-45秒):
+**功能展示** (约中间 50% 时长):
 - 2-3个核心功能/特色
 - 每个功能简明扼要
 - 配合平滑滚动展示
 - Action: scroll_to_text 或 smooth scroll
 
-**结尾号召** (45-{video_length}秒):
+**结尾号召** (约最后 25% 时长):
 - 总结核心优势
 - 明确行动号召
 - 滚回顶部或定位 CTA
@@ -225,20 +513,20 @@ class PromptOptimizer:
 - **简洁有力**: 每句话10-20字
 - **价值导向**: 突出"用户能获得什么"
 - **自然流畅**: 像真人讲解，不要太书面化
-- **节奏把控**: 总字数控制在 {video_length * 3} 字左右
+- **节奏把控**: 总字数控制在用户给出的字数预算左右
 
 ### Actions 设计要点
 
 可用动作类型:
-- `scroll`: {{y: 数值, smooth: true/false}}  # 滚动到指定位置
-- `scroll_to_text`: {{text: "文本", offset: 100}}  # 滚动到包含文本的元素
-- `click`: {{text: "按钮文字"}} 或 {{selector: "CSS选择器"}}
-- `wait`: {{duration: 秒数}}  # 停留时间
-- `goto`: {{url: "新URL"}}  # 页面跳转（慎用）
+- `scroll`: {y: 数值, smooth: true/false}  # 滚动到指定位置
+- `scroll_to_text`: {text: "文本", offset: 100}  # 滚动到包含文本的元素
+- `click`: {text: "按钮文字"} 或 {selector: "CSS选择器"}
+- `wait`: {duration: 秒数}  # 停留时间
+- `goto`: {url: "新URL"}  # 页面跳转（慎用）
 
 **注意**:
 - 每个场景 actions 执行时间应匹配 narration 时长
-- 滚动距离基于页面高度 {analysis.get('page_height', 3000)}px
+- 滚动距离基于用户给出的页面高度
 - 使用 smooth:true 创造流畅体验
 - wait 时间总和应接近但略小于 narration 时长
 
@@ -246,15 +534,15 @@ class PromptOptimizer:
 
 ```yaml
 project:
-  name: "{analysis.get('title', '产品演示')[:30]}"
+  name: "产品演示"
   resolution: [1920, 1080]
   fps: 30
-  voice: "{voice_map.get(language, 'zh-CN-XiaoxiaoNeural')}"
+  voice: "zh-CN-XiaoxiaoNeural"
   bitrate: "10000k"
 
 scenes:
   - id: "opening"
-    url: "{analysis['url']}"
+    url: "https://example.com"
     narration: "简洁的开场白，点出核心价值。"
     actions:
       - type: scroll
@@ -283,28 +571,9 @@ scenes:
         duration: 2
 ```
 
-请基于以上信息，生成一个高质量的演示视频脚本。直接输出 YAML，不要有额外说明。"""
+直接输出 YAML，不要有额外说明。"""
 
-        return prompt
-
-    @staticmethod
-    def build_deepseek_prompt(
-        analysis: Dict[str, Any],
-        requirements: Dict[str, Any]
-    ) -> str:
-        """DeepSeek-optimized prompt (more structured, code-focused)."""
-
-        video_length = requirements.get("video_length", 60)
-        language = requirements.get("language", "zh-CN")
-
-        prompt = f"""# 任务：生成产品演示视频脚本
-
-## 输入数据
-- URL: {analysis['url']}
-- 标题: {analysis.get('title', '')}
-- 核心内容: {', '.join([h['text'] for h in analysis.get('headings', [])[:5]])}
-- 视频时长: {video_length}秒
-- 语言: {language}
+_DEEPSEEK_SYSTEM_PROMPT = """# 任务：生成产品演示视频脚本
 
 ## 输出要求
 生成符合以下 schema 的 YAML 脚本:
@@ -328,51 +597,24 @@ scenes:  # 3-5个场景
 
 ## 约束条件
 1. 总场景数: 3-5个
-2. narration 总字数: ≈ {video_length * 3}字
+2. narration 总字数: ≈ 输入数据中的字数预算
 3. 每场景 wait 时间总和应匹配 narration 时长
-4. 滚动范围: 0 - {analysis.get('page_height', 3000)}px
+4. 滚动范围: 0 - 输入数据中的页面高度
 5. 必须包含开场、功能展示、结尾
 
 ## 输出
-直接输出可解析的 YAML，无额外文字。
-
-分析网站 {analysis['url']}，生成脚本:"""
-
-        return prompt
-
-    @staticmethod
-    def build_minimax_prompt(
-        analysis: Dict[str, Any],
-        requirements: Dict[str, Any]
-    ) -> str:
-        """MiniMax-optimized prompt (Chinese-friendly, creative)."""
-
-        video_length = requirements.get("video_length", 60)
-        style = requirements.get("style", "professional")
-
-        style_keywords = {
-            "professional": "专业、精准、高效",
-            "casual": "亲切、有趣、生活化",
-            "energetic": "激情、创新、未来感"
-        }
-
-        prompt = f"""请为网站 {analysis['url']} 生成一个{video_length}秒的产品演示视频脚本。
+直接输出可解析的 YAML，无额外文字。"""
 
-网站信息：
-• 名称：{analysis.get('title', '')}
-• 简介：{analysis.get('description', '')[:100]}
-• 主要模块：{', '.join([h['text'] for h in analysis.get('headings', [])[:6]])}
-
-脚本风格：{style_keywords.get(style, '专业')}
+_MINIMAX_SYSTEM_PROMPT = """你负责为网站生成产品演示视频脚本。
 
 请以 YAML 格式输出，包含：
 1. project 配置（name, resolution [1920,1080], fps 30, voice "zh-CN-XiaoxiaoNeural", bitrate "10000k"）
 2. scenes 数组，每个场景包含 id、narration（旁白）、actions（动作序列）
 
 场景设计：
-• 第1场景：开场，展示核心价值（0-20秒）
-• 第2-3场景：关键功能/亮点（20-45秒）
-• 最后场景：总结+行动号召（45-{video_length}秒）
+• 第1场景：开场，展示核心价值（约前 1/3 时长）
+• 第2-3场景：关键功能/亮点
+• 最后场景：总结+行动号召
 
 旁白要求：
 • 精练有力，每句10-25字
@@ -385,51 +627,32 @@ scenes:  # 3-5个场景
 • scroll_to_text: 定位元素 (text: "文字")
 • click: 点击 (text: "按钮")
 
-直接输出 YAML，不要有其他解释："""
-
-        return prompt
-
-    @staticmethod
-    def build_gemini_prompt(
-        analysis: Dict[str, Any],
-        requirements: Dict[str, Any]
-    ) -> str:
-        """Gemini-optimized prompt (multimodal, context-aware)."""
-
-        video_length = requirements.get("video_length", 60)
-
-        prompt = f"""Generate a professional product demo video script in YAML format.
+直接输出 YAML，不要有其他解释。"""
 
-Website Analysis:
-- URL: {analysis['url']}
-- Title: {analysis.get('title', '')}
-- Key Sections: {', '.join([h['text'] for h in analysis.get('headings', [])[:6]])}
-- Description: {analysis.get('description', '')[:150]}
-- Page Height: {analysis.get('page_height', 3000)}px
+_GEMINI_SYSTEM_PROMPT = """Generate a professional product demo video script in YAML format.
 
-Requirements:
-- Video Duration: {video_length} seconds
+Fixed Settings:
 - Resolution: 1920x1080
 - Language: Chinese (zh-CN)
 - FPS: 30
 - Voice: zh-CN-XiaoxiaoNeural
 
 Script Structure:
-1. Opening (0-15s): Hook + Value Proposition
-2. Features (15-50s): 2-3 Key Features
-3. Closing (50-{video_length}s): Summary + CTA
+1. Opening (first ~25%): Hook + Value Proposition
+2. Features (middle ~60%): 2-3 Key Features
+3. Closing (remaining time): Summary + CTA
 
 Narration Guidelines:
 - Concise and impactful (10-25 characters per line)
-- Total ≈ {video_length * 3} characters
+- Total length close to the character budget given with the website analysis
 - Natural, conversational tone
 - Focus on user benefits
 
 Actions Schema:
-- scroll: {{y: number, smooth: boolean}}
-- scroll_to_text: {{text: string, offset: number}}
-- wait: {{duration: number}}
-- click: {{text: string}}
+- scroll: {y: number, smooth: boolean}
+- scroll_to_text: {text: string, offset: number}
+- wait: {duration: number}
+- click: {text: string}
 
 Output valid YAML only, no explanations:
 
@@ -443,42 +666,18 @@ project:
 
 scenes:
   - id: "..."
-    url: "{analysis['url']}"
+    url: "..."
     narration: "..."
     actions:
       - type: ...
 ```"""
 
-        return prompt
-
-    @staticmethod
-    def build_gpt_prompt(
-        analysis: Dict[str, Any],
-        requirements: Dict[str, Any]
-    ) -> str:
-        """GPT-optimized prompt (instruction-following, structured)."""
-
-        video_length = requirements.get("video_length", 60)
-
-        prompt = f"""You are an expert video script writer specializing in SaaS product demos.
-
-Task: Create a {video_length}-second demo video script for the website.
-
-Input Data:
-```json
-{{
-  "url": "{analysis['url']}",
-  "title": "{analysis.get('title', '')}",
-  "headings": {[h['text'] for h in analysis.get('headings', [])[:5]]},
-  "page_height": {analysis.get('page_height', 3000)},
-  "cta_buttons": {analysis.get('cta_buttons', [])}
-}}
-```
+_GPT_SYSTEM_PROMPT = """You are an expert video script writer specializing in SaaS product demos.
 
 Output Requirements:
 1. Valid YAML format
 2. 3-5 scenes total
-3. Chinese narration (≈ {video_length * 3} chars total)
+3. Chinese narration (total length close to the given character budget)
 4. Precise browser actions (scroll/wait/click)
 
 Schema:
@@ -502,11 +701,262 @@ scenes:
 Scene Flow:
 1. Opening: Value prop + hero section
 2. Middle: Key features (2-3)
-3. Closing: Summary + CTA
+3. Closing: Summary + CTA"""
+
+
+_VOICE_MAP = {
+    "zh-CN": "zh-CN-XiaoxiaoNeural",
+    "zh-TW": "zh-TW-HsiaoChenNeural",
+    "en-US": "en-US-JennyNeural",
+    "ja-JP": "ja-JP-NanamiNeural",
+}
+
+_CLAUDE_STYLE_GUIDE = {
+    "professional": "专业、权威、重点突出产品价值",
+    "casual": "轻松、友好、贴近用户日常使用场景",
+    "energetic": "活力、激情、强调创新和突破"
+}
+
+_MINIMAX_STYLE_KEYWORDS = {
+    "professional": "专业、精准、高效",
+    "casual": "亲切、有趣、生活化",
+    "energetic": "激情、创新、未来感"
+}
+
+# Per-site user prompts, filled from _prompt_context() with str.format_map
+_CLAUDE_USER_TEMPLATE = """## 网站分析结果
+
+**URL**: {url}
+**标题**: {title_or_na}
+**描述**: {description_or_na}
+
+**主要内容结构**:
+{headings_list_8}
+
+**核心信息**:
+{sections_list_5}
+
+**行动号召**: {cta_5}
+
+## 脚本要求
+
+- **视频时长**: {video_length}秒
+- **叙事风格**: {claude_style}
+- **语言**: {language}
+- **分辨率**: 1920x1080 (16:9)
+- **目标**: 在{video_length}秒内清晰展示产品核心价值，引导用户行动
+- **旁白字数预算**: {narration_budget} 字左右
+- **页面高度**: {page_height}px
+- **project.name**: "{project_name}"
+- **project.voice**: "{voice}"
+- **首个场景 url**: "{url}"
+
+请基于以上信息，生成一个高质量的演示视频脚本。"""
+
+_DEEPSEEK_USER_TEMPLATE = """## 输入数据
+- URL: {url}
+- 标题: {title}
+- 核心内容: {headings_5}
+- 视频时长: {video_length}秒
+- 语言: {language}
+- 字数预算: {narration_budget}字
+- 页面高度: {page_height}px
+
+分析网站 {url}，生成脚本:"""
+
+_MINIMAX_USER_TEMPLATE = """请为网站 {url} 生成一个{video_length}秒的产品演示视频脚本。
+
+网站信息：
+• 名称：{title}
+• 简介：{description_100}
+• 主要模块：{headings_6}
+
+脚本风格：{minimax_style}"""
+
+_GEMINI_USER_TEMPLATE = """Website Analysis:
+- URL: {url}
+- Title: {title}
+- Key Sections: {headings_6}
+- Description: {description_150}
+- Page Height: {page_height}px
+
+Requirements:
+- Video Duration: {video_length} seconds
+- Narration Budget: ≈ {narration_budget} characters"""
+
+_GPT_USER_TEMPLATE = """Task: Create a {video_length}-second demo video script for the website.
+Narration budget: ≈ {narration_budget} Chinese characters.
+
+Input Data:
+```json
+{{
+  "url": "{url}",
+  "title": "{title}",
+  "headings": {headings_5_repr},
+  "page_height": {page_height},
+  "cta_buttons": {cta_repr}
+}}
+```
 
 Generate the YAML script now:"""
 
-        return prompt
+
+def _prompt_context(analysis: Dict[str, Any], requirements: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute every field the user prompt templates reference."""
+    video_length = requirements.get("video_length", 60)
+    style = requirements.get("style", "professional")
+    language = requirements.get("language", "zh-CN")
+    headings = [h['text'] for h in analysis.get('headings', [])]
+    title = analysis.get('title', '')
+    description = analysis.get('description', '')
+    cta_buttons = analysis.get('cta_buttons', [])
+
+    return {
+        "url": analysis['url'],
+        "title": title,
+        "title_or_na": analysis.get('title', 'N/A'),
+        "description_or_na": analysis.get('description', 'N/A'),
+        "description_100": description[:100],
+        "description_150": description[:150],
+        "headings_5": ', '.join(headings[:5]),
+        "headings_6": ', '.join(headings[:6]),
+        "headings_5_repr": headings[:5],
+        "headings_list_8": "\n".join([f"  - {h}" for h in headings[:8]]),
+        "sections_list_5": "\n".join([f"  - {s[:150]}" for s in analysis.get('sections', [])[:5]]),
+        "cta_5": ', '.join(cta_buttons[:5]),
+        "cta_repr": cta_buttons,
+        "page_height": analysis.get('page_height', 3000),
+        "project_name": analysis.get('title', '产品演示')[:30],
+        "video_length": video_length,
+        "narration_budget": video_length * 3,
+        "language": language,
+        "voice": _VOICE_MAP.get(language, 'zh-CN-XiaoxiaoNeural'),
+        "claude_style": _CLAUDE_STYLE_GUIDE.get(style, '专业'),
+        "minimax_style": _MINIMAX_STYLE_KEYWORDS.get(style, '专业'),
+    }
+
+
+class PromptOptimizer:
+    """Optimized prompts for different AI models.
+
+    Each builder returns a ``(system_prompt, user_prompt)`` pair. The system
+    part is a module-level constant that never varies between calls, so
+    providers can serve it from their prompt cache; everything derived from
+    the website analysis or requirements goes into the user part, rendered
+    from a module-level template.
+    """
+
+    @staticmethod
+    @_memoize_prompt
+    def build_claude_prompt(
+        analysis: Dict[str, Any],
+        requirements: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        """Claude-optimized prompt with detailed instructions."""
+        context = _prompt_context(analysis, requirements)
+        return _CLAUDE_SYSTEM_PROMPT, _CLAUDE_USER_TEMPLATE.format_map(context)
+
+    @staticmethod
+    @_memoize_prompt
+    def build_deepseek_prompt(
+        analysis: Dict[str, Any],
+        requirements: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        """DeepSeek-optimized prompt (more structured, code-focused)."""
+        context = _prompt_context(analysis, requirements)
+        return _DEEPSEEK_SYSTEM_PROMPT, _DEEPSEEK_USER_TEMPLATE.format_map(context)
+
+    @staticmethod
+    @_memoize_prompt
+    def build_minimax_prompt(
+        analysis: Dict[str, Any],
+        requirements: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        """MiniMax-optimized prompt (Chinese-friendly, creative)."""
+        context = _prompt_context(analysis, requirements)
+        return _MINIMAX_SYSTEM_PROMPT, _MINIMAX_USER_TEMPLATE.format_map(context)
+
+    @staticmethod
+    @_memoize_prompt
+    def build_gemini_prompt(
+        analysis: Dict[str, Any],
+        requirements: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        """Gemini-optimized prompt (multimodal, context-aware)."""
+        context = _prompt_context(analysis, requirements)
+        return _GEMINI_SYSTEM_PROMPT, _GEMINI_USER_TEMPLATE.format_map(context)
+
+    @staticmethod
+    @_memoize_prompt
+    def build_gpt_prompt(
+        analysis: Dict[str, Any],
+        requirements: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        """GPT-optimized prompt (instruction-following, structured)."""
+        context = _prompt_context(analysis, requirements)
+        return _GPT_SYSTEM_PROMPT, _GPT_USER_TEMPLATE.format_map(context)
+
+
+# Provider -> model name
+_PROVIDER_MODELS = {
+    "claude": "claude-3-5-sonnet-20241022",
+    "deepseek": "deepseek-chat",
+    "minimax": "abab6.5-chat",
+    "gemini": "gemini-pro",
+    "gpt": "gpt-4-turbo-preview",
+}
+
+_TEMPERATURE = 0.7
+
+
+class ScriptCache:
+    """Disk cache of parsed scripts keyed by an exact prompt hash.
+
+    Prompts are derived deterministically from the analysis and
+    requirements, so an identical (provider, model, temperature, prompt)
+    tuple can reuse the previous script instead of calling the API again.
+    """
+
+    def __init__(self, cache_dir: str | Path = "output/.script_cache", ttl: float = 7 * 86400):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+
+    @staticmethod
+    def key(provider: str, system_prompt: str, user_prompt: str) -> str:
+        material = "\0".join([
+            provider,
+            _PROVIDER_MODELS[provider],
+            str(_TEMPERATURE),
+            system_prompt,
+            user_prompt,
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached script for ``key`` if present and fresh."""
+        try:
+            data = orjson.loads((self.cache_dir / f"{key}.json").read_bytes())
+        except (OSError, ValueError):
+            return None
+        if time.time() - data["stored_at"] >= self.ttl:
+            return None
+        return data["script"]
+
+    def put(self, key: str, script: Dict[str, Any]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / f"{key}.json").write_bytes(
+            orjson.dumps({"stored_at": time.time(), "script": script})
+        )
+
+
+# Provider -> prompt builder
+_PROMPT_BUILDERS = {
+    "claude": PromptOptimizer.build_claude_prompt,
+    "deepseek": PromptOptimizer.build_deepseek_prompt,
+    "minimax": PromptOptimizer.build_minimax_prompt,
+    "gemini": PromptOptimizer.build_gemini_prompt,
+    "gpt": PromptOptimizer.build_gpt_prompt,
+}
 
 
 class MultiProviderScriptGenerator:
@@ -515,14 +965,19 @@ class MultiProviderScriptGenerator:
     def __init__(
         self,
         provider: ModelProvider = "claude",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        script_cache: Optional[ScriptCache] = None
     ):
         self.provider = provider
         self.api_key = api_key or self._get_api_key(provider)
+        self.script_cache = script_cache or ScriptCache()
+
+        # Prompt-cache tokens reported by the most recent call
+        self.last_cached_tokens = 0
 
-        # Initialize clients
-        self.clients = {}
-        self._init_clients()
+        # Provider SDK client and the HTTP pool it was built on; rebuilt by
+        # _client() when the pool changes (new event loop, or closed)
+        self._sdk_client: Optional[Tuple[Any, Any]] = None
 
     def _get_api_key(self, provider: ModelProvider) -> str:
         """Get API key from environment."""
@@ -539,99 +994,229 @@ class MultiProviderScriptGenerator:
             raise ValueError(f"{env_keys[provider]} environment variable not set")
         return key
 
-    def _init_clients(self):
-        """Initialize API clients."""
+    def _client(self):
+        """Return the provider's SDK client on the running loop's HTTP pool."""
+        http_client = get_http_client()
+        if self._sdk_client is not None and self._sdk_client[0] is http_client:
+            return self._sdk_client[1]
+
         try:
             if self.provider == "claude":
-                self.clients["claude"] = anthropic.Anthropic(api_key=self.api_key)
-            elif self.provider in ["gpt", "deepseek"]:
+                import anthropic
+
+                client = anthropic.AsyncAnthropic(
+                    api_key=self.api_key,
+                    http_client=http_client
+                )
+            else:
+                from openai import AsyncOpenAI
+
                 base_url = None
                 if self.provider == "deepseek":
                     base_url = "https://api.deepseek.com"
-                self.clients[self.provider] = AsyncOpenAI(
+                client = AsyncOpenAI(
                     api_key=self.api_key,
-                    base_url=base_url
+                    base_url=base_url,
+                    http_client=http_client
                 )
         except Exception as e:
             raise ValueError(f"Failed to initialize {self.provider} client: {e}")
 
+        self._sdk_client = (http_client, client)
+        return client
+
     async def generate_script(
         self,
         website_analysis: Dict[str, Any],
-        requirements: Optional[Dict[str, Any]] = None
+        requirements: Optional[Dict[str, Any]] = None,
+        use_script_cache: bool = True
     ) -> Dict[str, Any]:
-        """Generate script using selected AI provider."""
+        """Generate script using selected AI provider.
+
+        An identical prompt generated within the script cache's TTL returns
+        the stored script without calling the API.
+
+        After the call, ``last_cached_tokens`` holds the number of prompt
+        tokens the provider served from its prompt cache (0 on a miss, on a
+        script cache hit, or when the provider doesn't report it).
+        """
 
         requirements = requirements or {}
+        system_prompt, user_prompt = self._build_prompt(website_analysis, requirements)
+        cache_key = ScriptCache.key(self.provider, system_prompt, user_prompt)
 
-        # Build optimized prompt
-        prompt = self._build_prompt(website_analysis, requirements)
-
-        # Call appropriate API
-        if self.provider == "claude":
-            response_text = await self._call_claude(prompt)
-        elif self.provider == "deepseek":
-            response_text = await self._call_deepseek(prompt)
-        elif self.provider == "minimax":
-            response_text = await self._call_minimax(prompt, requirements)
-        elif self.provider == "gemini":
-            response_text = await self._call_gemini(prompt)
-        elif self.provider == "gpt":
-            response_text = await self._call_gpt(prompt)
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+        if use_script_cache:
+            cached = self.script_cache.get(cache_key)
+            if cached is not None:
+                self.last_cached_tokens = 0
+                return cached
+
+        response_text = await self._collect_script_text(system_prompt, user_prompt)
 
         # Parse YAML
         script_data = self._parse_script(response_text)
 
+        self.script_cache.put(cache_key, script_data)
         return script_data
 
+    async def _collect_script_text(self, system_prompt: str, user_prompt: str) -> str:
+        """Accumulate streamed text, stopping once the YAML code block closes.
+
+        ``_parse_script`` only reads the first fenced block, so any prose the
+        model appends after it is cancelled instead of waited for. Providers
+        in ``_USAGE_AT_END`` are read to the end regardless, since their
+        usage (and so ``last_cached_tokens``) only arrives on the last chunk.
+        """
+        self.last_cached_tokens = 0
+        drain = self.provider in self._USAGE_AT_END
+        parts: List[str] = []
+        fences = 0
+        scanned = 0
+        last_fence_end = 0
+
+        stream = self._stream_prompt(system_prompt, user_prompt)
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                if "`" not in chunk:
+                    continue
+                # Rescan a small overlap so fences split across chunks count
+                text = "".join(parts)
+                pos = max(scanned - 2, last_fence_end)
+                while (pos := text.find("```", pos)) != -1:
+                    fences += 1
+                    pos = last_fence_end = pos + 3
+                    if fences == 2:
+                        if drain:
+                            async for _ in stream:
+                                pass
+                        return text[:pos]
+                scanned = len(text)
+        finally:
+            await stream.aclose()
+
+        return "".join(parts)
+
+    async def stream_text(
+        self,
+        website_analysis: Dict[str, Any],
+        requirements: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Stream the raw script text from the selected AI provider.
+
+        Claude, DeepSeek and GPT yield text as tokens arrive; MiniMax and
+        Gemini yield the full response at once. ``last_cached_tokens`` is
+        set once the stream is exhausted.
+        """
+
+        requirements = requirements or {}
+
+        # Build optimized prompt
+        system_prompt, user_prompt = self._build_prompt(website_analysis, requirements)
+
+        async for chunk in self._stream_prompt(system_prompt, user_prompt):
+            yield chunk
+
+    def _stream_prompt(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Send a built prompt to the provider's streaming call."""
+        stream = self._STREAMERS.get(self.provider)
+        if stream is None:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+        return stream(self, system_prompt, user_prompt)
+
     def _build_prompt(
         self,
         analysis: Dict[str, Any],
         requirements: Dict[str, Any]
-    ) -> str:
-        """Build optimized prompt for the provider."""
-
-        if self.provider == "claude":
-            return PromptOptimizer.build_claude_prompt(analysis, requirements)
-        elif self.provider == "deepseek":
-            return PromptOptimizer.build_deepseek_prompt(analysis, requirements)
-        elif self.provider == "minimax":
-            return PromptOptimizer.build_minimax_prompt(analysis, requirements)
-        elif self.provider == "gemini":
-            return PromptOptimizer.build_gemini_prompt(analysis, requirements)
-        elif self.provider == "gpt":
-            return PromptOptimizer.build_gpt_prompt(analysis, requirements)
-
-    async def _call_claude(self, prompt: str) -> str:
-        """Call Claude API."""
-        client = self.clients["claude"]
-
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4096,
-            temperature=0.7,
-            messages=[{"role": "user", "content": prompt}]
-        )
+    ) -> Tuple[str, str]:
+        """Build optimized (system, user) prompt pair for the provider."""
+
+        return _PROMPT_BUILDERS[self.provider](analysis, requirements)
+
+    @staticmethod
+    def _chat_messages(system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+        """Build OpenAI-style messages with the static prompt first.
 
-        return message.content[0].text
+        OpenAI and DeepSeek cache prompt prefixes automatically, so the
+        system message must lead and stay byte-identical between calls.
+        """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
 
-    async def _call_deepseek(self, prompt: str) -> str:
-        """Call DeepSeek API."""
-        client = self.clients["deepseek"]
+    async def _stream_claude(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Stream text from the Claude API."""
+        client = self._client()
 
-        response = await client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[{"role": "user", "content": prompt}],
+        async with client.messages.stream(
+            model=_PROVIDER_MODELS["claude"],
             max_tokens=4096,
-            temperature=0.7
+            temperature=_TEMPERATURE,
+            # Not marked with cache_control: the static prompt (~700-900
+            # tokens) is below Claude's 1024-token caching minimum, so a
+            # marker would never take effect. Same policy as ai_generator.py.
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}]
+        ) as stream:
+            usage_read = False
+            async for text in stream.text_stream:
+                if not usage_read:
+                    # Input usage comes with message_start; read it before the
+                    # first yield, as the caller may close the stream early
+                    usage = stream.current_message_snapshot.usage
+                    self.last_cached_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
+                    usage_read = True
+                yield text
+
+            message = await stream.get_final_message()
+
+        self.last_cached_tokens = getattr(message.usage, "cache_read_input_tokens", None) or 0
+
+    async def _stream_openai_compatible(
+        self,
+        model: str,
+        system_prompt: str,
+        user_prompt: str
+    ) -> AsyncIterator[str]:
+        """Stream text from an OpenAI-compatible chat API (GPT, DeepSeek).
+
+        Usage arrives on the final chunk, which has no choices.
+        """
+        client = self._client()
+
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=self._chat_messages(system_prompt, user_prompt),
+            max_tokens=4096,
+            temperature=_TEMPERATURE,
+            stream=True,
+            stream_options={"include_usage": True}
         )
 
-        return response.choices[0].message.content
+        usage = None
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+        if self.provider == "deepseek":
+            self.last_cached_tokens = getattr(usage, "prompt_cache_hit_tokens", None) or 0
+        else:
+            details = getattr(usage, "prompt_tokens_details", None)
+            self.last_cached_tokens = getattr(details, "cached_tokens", None) or 0
+
+    def _stream_deepseek(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Stream text from the DeepSeek API."""
+        return self._stream_openai_compatible(_PROVIDER_MODELS["deepseek"], system_prompt, user_prompt)
 
-    async def _call_minimax(self, prompt: str, requirements: Dict) -> str:
-        """Call MiniMax API."""
+    def _stream_gpt(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Stream text from the OpenAI GPT API."""
+        return self._stream_openai_compatible(_PROVIDER_MODELS["gpt"], system_prompt, user_prompt)
+
+    async def _stream_minimax(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Call MiniMax API (returns the whole response as one chunk)."""
         url = "https://api.minimax.chat/v1/text/chatcompletion_v2"
 
         headers = {
@@ -640,68 +1225,68 @@ class MultiProviderScriptGenerator:
         }
 
         payload = {
-            "model": "abab6.5-chat",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
+            "model": _PROVIDER_MODELS["minimax"],
+            "messages": self._chat_messages(system_prompt, user_prompt),
+            "temperature": _TEMPERATURE,
             "max_tokens": 4096
         }
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+        # orjson encodes straight to UTF-8 bytes; httpx's json= goes through
+        # stdlib json and a separate encode
+        response = await get_http_client().post(url, content=orjson.dumps(payload), headers=headers)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        self.last_cached_tokens = 0
+        yield data["choices"][0]["message"]["content"]
+
+    async def _stream_gemini(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Call Google Gemini API (returns the whole response as one chunk).
 
-    async def _call_gemini(self, prompt: str) -> str:
-        """Call Google Gemini API."""
-        url = f"https://generativelanguage.googleapis.com/v1/models/gemini-pro:generateContent?key={self.api_key}"
+        The static prompt is sent as the leading part so Gemini's implicit
+        prefix caching can apply; explicit CachedContent needs a far larger
+        minimum prefix than these prompts have.
+        """
+        url = f"https://generativelanguage.googleapis.com/v1/models/{_PROVIDER_MODELS['gemini']}:generateContent?key={self.api_key}"
 
         payload = {
             "contents": [{
-                "parts": [{"text": prompt}]
+                "parts": [{"text": system_prompt}, {"text": user_prompt}]
             }],
             "generationConfig": {
-                "temperature": 0.7,
+                "temperature": _TEMPERATURE,
                 "maxOutputTokens": 4096
             }
         }
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return data["candidates"][0]["content"]["parts"][0]["text"]
-
-    async def _call_gpt(self, prompt: str) -> str:
-        """Call OpenAI GPT API."""
-        client = self.clients["gpt"]
-
-        response = await client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=4096,
-            temperature=0.7
+        response = await get_http_client().post(
+            url, content=orjson.dumps(payload), headers={"Content-Type": "application/json"}
         )
-
-        return response.choices[0].message.content
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        self.last_cached_tokens = data.get("usageMetadata", {}).get("cachedContentTokenCount", 0)
+        yield data["candidates"][0]["content"]["parts"][0]["text"]
+
+    # Providers that only report usage on the final chunk of the stream
+    _USAGE_AT_END = {"deepseek", "gpt"}
+
+    # Provider -> streaming API call, looked up once per request
+    _STREAMERS = {
+        "claude": _stream_claude,
+        "deepseek": _stream_deepseek,
+        "minimax": _stream_minimax,
+        "gemini": _stream_gemini,
+        "gpt": _stream_gpt,
+    }
 
     def _parse_script(self, response_text: str) -> Dict[str, Any]:
         """Parse YAML from AI response."""
 
         # Extract YAML from markdown code blocks if present
-        if "```yaml" in response_text:
-            start = response_text.find("```yaml") + 7
-            end = response_text.find("```", start)
-            yaml_text = response_text[start:end].strip()
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            end = response_text.find("```", start)
-            yaml_text = response_text[start:end].strip()
-        else:
-            yaml_text = response_text.strip()
+        match = _FENCE_RE.search(response_text)
+        yaml_text = (match.group(1) if match else response_text).strip()
 
         try:
-            script_data = yaml.safe_load(yaml_text)
+            script_data = yaml.load(yaml_text, Loader=_YamlLoader)
 
             # Validate basic structure
             if not isinstance(script_data, dict):
@@ -734,8 +1319,8 @@ async def generate_demo_script(
     """
 
     # Analyze website
-    analyzer = WebsiteAnalyzer()
-    analysis = await analyzer.analyze(url)
+    async with WebsiteAnalyzer() as analyzer:
+        analysis = await analyzer.analyze(url)
 
     # Generate script
     generator = MultiProviderScriptGenerator(provider, api_key)
@@ -756,34 +1341,34 @@ async def compare_providers(
     """
 
     # Analyze website once
-    analyzer = WebsiteAnalyzer()
-    analysis = await analyzer.analyze(url)
+    async with WebsiteAnalyzer() as analyzer:
+        analysis = await analyzer.analyze(url)
 
     # Generate scripts in parallel
-    tasks = []
+    coros = {}
     for provider in providers:
         try:
             generator = MultiProviderScriptGenerator(provider)
-            task = generator.generate_script(analysis, requirements)
-            tasks.append((provider, task))
+            coros[provider] = generator.generate_script(analysis, requirements)
         except Exception as e:
             print(f"Warning: Skipping {provider}: {e}")
 
-    # Wait for all
+    # Wait for all; one failing provider doesn't cancel the others
+    outcomes = await asyncio.gather(*coros.values(), return_exceptions=True)
+
     results = {}
-    for provider, task in tasks:
-        try:
-            script = await task
+    for provider, outcome in zip(coros, outcomes):
+        if isinstance(outcome, Exception):
             results[provider] = {
-                "script": script,
+                "error": str(outcome),
                 "provider": provider,
-                "success": True
+                "success": False
             }
-        except Exception as e:
+        else:
             results[provider] = {
-                "error": str(e),
+                "script": outcome,
                 "provider": provider,
-                "success": False
+                "success": True
             }
 
     return results
@@ -803,7 +1388,10 @@ if __name__ == "__main__":
 
     async def main():
         print(f"Generating script using {provider}...")
-        script = await generate_demo_script(url, provider=provider)
-        print(yaml.dump(script, allow_unicode=True, sort_keys=False))
+        try:
+            script = await generate_demo_script(url, provider=provider)
+        finally:
+            await close_http_client()
+        print(yaml.dump(script, Dumper=_YamlDumper, allow_unicode=True, sort_keys=False))
 
     asyncio.run(main())
@@ -1,8 +1,13 @@
 """Video and audio merger."""
 
+import subprocess
 from pathlib import Path
 from typing import Optional
-from moviepy import VideoFileClip, AudioFileClip, CompositeAudioClip
+
+
+# Containers whose video stream (H.264 from previous renders) can be copied
+# into the MP4 output as-is; Playwright's VP8 .webm recordings cannot
+_STREAM_COPY_SUFFIXES = {".mp4", ".m4v", ".mov"}
 
 
 class VideoMerger:
@@ -12,7 +17,7 @@ class VideoMerger:
         self,
         fps: int = 30,
         bitrate: str = "8000k",
-        preset: str = "slow",
+        preset: str = "medium",
     ):
         self.fps = fps
         self.bitrate = bitrate
@@ -43,45 +48,60 @@ class VideoMerger:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Load video
-        video = VideoFileClip(str(video_path))
+        from moviepy.config import FFMPEG_BINARY
         
-        # Trim start if needed
+        cmd = [FFMPEG_BINARY, "-y"]
+
+        # Input seek: timestamps are relative to the trimmed video
         if trim_start > 0:
-            video = video.subclipped(trim_start, video.duration)
-        
-        # Build audio tracks
-        audio_clips = []
+            cmd += ["-ss", f"{trim_start:.3f}"]
+        cmd += ["-i", str(video_path)]
+
+        # Delay each narration to its scene start and mix them in one graph
+        filters = []
+        labels = []
         for scene_id, ts in timestamps.items():
             audio_path = audio_dir / f"{scene_id}.mp3"
             if audio_path.exists():
-                start_time = ts["start"]
-                audio = AudioFileClip(str(audio_path))
-                audio = audio.with_start(start_time)
-                audio_clips.append(audio)
-        
-        # Composite audio
-        if audio_clips:
-            final_audio = CompositeAudioClip(audio_clips)
-            final_video = video.with_audio(final_audio)
-        else:
-            final_video = video
-        
-        # Write output
-        final_video.write_videofile(
-            str(output_path),
-            codec="libx264",
-            audio_codec="aac",
-            fps=self.fps,
-            preset=self.preset,
-            bitrate=self.bitrate,
+                index = len(labels) + 1
+                delay_ms = round(ts["start"] * 1000)
+                cmd += ["-i", str(audio_path)]
+                filters.append(f"[{index}:a]adelay={delay_ms}:all=1[a{index}]")
+                labels.append(f"[a{index}]")
+
+        cmd += ["-map", "0:v:0"]
+        if labels:
+            # Pad with silence so -shortest ends on the video, not the audio
+            filters.append(f"{''.join(labels)}amix=inputs={len(labels)}:normalize=0,apad[aout]")
+            cmd += [
+                "-filter_complex", ";".join(filters),
+                "-map", "[aout]",
+                "-c:a", "aac",
+                "-shortest",
+            ]
+
+        stream_copy = (
+            trim_start == 0
+            and video_path.suffix.lower() in _STREAM_COPY_SUFFIXES
+            and output_path.suffix.lower() in _STREAM_COPY_SUFFIXES
         )
-        
-        # Cleanup
-        video.close()
-        for clip in audio_clips:
-            clip.close()
-        
+        if stream_copy:
+            # Untouched frames: remux instead of re-encoding
+            cmd += ["-c:v", "copy"]
+        else:
+            cmd += [
+                "-c:v", "libx264",
+                "-preset", self.preset,
+                "-b:v", self.bitrate,
+                "-r", str(self.fps),
+                "-pix_fmt", "yuv420p",
+            ]
+        cmd.append(str(output_path))
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to merge {video_path}:\n{result.stderr[-2000:]}")
+
         return output_path
     
     @staticmethod
@@ -104,21 +124,20 @@ class VideoMerger:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         def format_time(seconds: float) -> str:
-            h = int(seconds // 3600)
-            m = int((seconds % 3600) // 60)
-            s = int(seconds % 60)
-            ms = int((seconds % 1) * 1000)
+            h, rest = divmod(round(seconds * 1000), 3_600_000)
+            m, rest = divmod(rest, 60_000)
+            s, ms = divmod(rest, 1000)
             return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
         
-        with open(output_path, "w", encoding="utf-8") as f:
-            for i, (scene_id, ts) in enumerate(timestamps.items(), 1):
-                if scene_id in narrations:
-                    start = ts["start"]
-                    duration = ts["audio_duration"]
-                    end = start + duration
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{format_time(start)} --> {format_time(end)}\n")
-                    f.write(f"{narrations[scene_id]}\n\n")
+        blocks = []
+        for i, (scene_id, ts) in enumerate(timestamps.items(), 1):
+            if scene_id in narrations:
+                start = ts["start"]
+                end = start + ts["audio_duration"]
+                blocks.append(
+                    f"{i}\n{format_time(start)} --> {format_time(end)}\n{narrations[scene_id]}\n\n"
+                )
+        
+        output_path.write_text("".join(blocks), encoding="utf-8")
         
         return output_path
@@ -1,13 +1,137 @@
 """Browser-based video recorder using Playwright."""
 
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+import subprocess
 import time
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Any, Awaitable, Optional, Callable, TypeVar, TYPE_CHECKING
 from dataclasses import dataclass, field
-from playwright.sync_api import sync_playwright, Page, BrowserContext
 
 from .script import Scene, Action, Project
 
+# Playwright is imported where a browser is first needed, so importing the
+# package (e.g. to parse a script or list voices) doesn't load its driver
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, BrowserContext, Route
+
+T = TypeVar("T")
+
+# Static assets served from VideoRecorder's in-memory cache on repeat visits.
+# Only URLs that look like assets are routed at all, so documents, XHR/fetch
+# and media (which must stream) never make a round trip through Python
+_ASSET_URL_RE = re.compile(
+    r"\.(?:png|jpe?g|gif|webp|avif|svg|ico|woff2?|ttf|otf|css|m?js)(?:[?#]|$)",
+    re.IGNORECASE,
+)
+_CACHEABLE_RESOURCE_TYPES = {"image", "font", "script", "stylesheet"}
+_ASSET_CACHE_MAX_BYTES = 256 * 1024 * 1024
+_MAX_CACHED_ASSET_BYTES = 32 * 1024 * 1024
+# Response headers replayed from the cache (the body is stored decoded)
+_CACHED_ASSET_HEADERS = ("content-type", "access-control-allow-origin", "cache-control")
+
+
+# Actions that only touch the DOM; consecutive ones run in a single
+# page.evaluate instead of one protocol round trip (plus slow_mo) each
+_DOM_ACTIONS = {"scroll", "scroll_to_text", "scroll_iframe"}
+
+_RUN_DOM_ACTIONS_JS = """async (actions) => {
+    const sleep = ms => new Promise(r => setTimeout(r, ms));
+    const norm = s => (s || "").replace(/\\s+/g, " ").toLowerCase();
+    // Smallest element containing the text, like Playwright's text= selector
+    // Like Playwright's text engine, ignore the contents of non-rendered tags
+    const SKIP = new Set(["SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE"]);
+    const textOf = el => {
+        let s = "";
+        for (const n of el.childNodes) {
+            if (n.nodeType === Node.TEXT_NODE) s += n.data;
+            else if (n.nodeType === Node.ELEMENT_NODE && !SKIP.has(n.tagName)) s += textOf(n);
+        }
+        return s;
+    };
+    const findText = text => {
+        const needle = norm(text).trim();
+        if (!needle || !norm(textOf(document.body)).includes(needle)) return null;
+        let el = document.body;
+        for (;;) {
+            const matches = [...el.children].filter(
+                c => !SKIP.has(c.tagName) && norm(textOf(c)).includes(needle)
+            );
+            // Prefer rendered elements; display: contents ones have no boxes
+            // but their children may
+            const child = matches.find(c => c.getClientRects().length) || matches[0];
+            if (!child) break;
+            el = child;
+        }
+        while (el !== document.body && !el.getClientRects().length) el = el.parentElement;
+        return el;
+    };
+    // Elements resolved by scroll_to_text, kept for the life of the document
+    // so later scenes skip the tree walk; a CSS selector skips it entirely
+    const textCache = window.__dvgTextCache || (window.__dvgTextCache = new Map());
+    const findAnchor = a => {
+        if (a.selector) {
+            // A malformed selector must not reject the whole batch
+            try {
+                return document.querySelector(a.selector);
+            } catch (e) {
+                return null;
+            }
+        }
+        let el = textCache.get(a.text);
+        if (!el || !el.isConnected) {
+            el = findText(a.text);
+            if (el) textCache.set(a.text, el);
+        }
+        return el;
+    };
+
+    for (const a of actions) {
+        if (a.type === "scroll") {
+            window.scrollTo({top: a.y || 0, behavior: a.smooth ? "smooth" : "instant"});
+            await sleep(500);
+        } else if (a.type === "scroll_to_text") {
+            const el = findAnchor(a);
+            if (el) {
+                const r = el.getBoundingClientRect();
+                if (r.top < 0 || r.bottom > window.innerHeight) {
+                    el.scrollIntoView({block: "center"});
+                }
+                await sleep(300);
+                window.scrollBy(0, -(a.offset || 0));
+            }
+            await sleep(500);
+        } else if (a.type === "scroll_iframe") {
+            for (const pos of a.positions || [300, 600, 900]) {
+                const iframe = document.querySelector("iframe");
+                if (iframe && iframe.contentWindow) {
+                    iframe.contentWindow.scrollTo({top: pos, behavior: "smooth"});
+                }
+                await sleep((a.interval ?? 1.5) * 1000);
+            }
+        }
+    }
+}"""
+
+# The runner is installed once per document by an init script, so each
+# batch only ships its action list and a one-line call. The call reports
+# false if the runner is missing (the init script didn't run, or the page
+# replaced it); the batch is then rerun with the runner sent inline.
+_INSTALL_DOM_ACTIONS_JS = f"window.__dvgRunActions = {_RUN_DOM_ACTIONS_JS};"
+_CALL_DOM_ACTIONS_JS = """async actions => {
+    if (typeof window.__dvgRunActions !== "function") return false;
+    await window.__dvgRunActions(actions);
+    return true;
+}"""
+_INLINE_DOM_ACTIONS_JS = f"async actions => {{ {_INSTALL_DOM_ACTIONS_JS} await window.__dvgRunActions(actions); }}"
+
 
 @dataclass
 class RecordingResult:
@@ -18,8 +142,34 @@ class RecordingResult:
     login_duration: float = 0  # Duration to trim from start
 
 
+@dataclass
+class _SegmentClip:
+    """One segment's raw clip from ``VideoRecorder.record_parallel``."""
+    video_path: Path
+    duration: float  # From the segment's first scene to its last one ending
+    timestamps: dict[str, dict]  # relative to the segment's first scene
+
+
 class VideoRecorder:
-    """Browser-based video recorder."""
+    """Browser-based video recorder.
+    
+    The recorder drives Playwright's async API. ``record_async`` and
+    ``record_parallel_async`` can share an event loop with other work
+    (such as TTS); ``record`` and ``record_parallel`` run them on an event
+    loop owned by the recorder.
+    
+    Use as a context manager (``with`` or ``async with``) to keep one
+    Chromium instance across several recordings; it is launched on first
+    use and each recording then only opens a new context (a recording
+    context can't be reused, since its video is finalized when it closes).
+    Outside a context manager every call launches its own browser.
+    
+    With ``cache_assets`` (the default), static assets are kept in memory
+    for the recorder's lifetime and replayed to every later context, so
+    scenes and segments that revisit a page don't download it again.
+    Routing turns off Chromium's HTTP cache for those asset URLs; pass
+    ``cache_assets=False`` to leave all caching to the browser.
+    """
     
     def __init__(
         self,
@@ -27,174 +177,623 @@ class VideoRecorder:
         resolution: tuple[int, int] = (1440, 900),
         headless: bool = False,
         slow_mo: int = 100,
+        clip_cache_dir: Optional[str | Path] = None,
+        clip_cache_ttl: float = 86400.0,
+        cache_assets: bool = True,
     ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.resolution = resolution
         self.headless = headless
         self.slow_mo = slow_mo
+        self.clip_cache_dir = Path(clip_cache_dir) if clip_cache_dir else None
+        self.clip_cache_ttl = clip_cache_ttl
+        self.cache_assets = cache_assets
+        # url -> (status, headers, body), least recently used first
+        self._asset_cache: OrderedDict[str, tuple[int, dict[str, str], bytes]] = OrderedDict()
+        self._asset_cache_bytes = 0
+        self._playwright = None
+        self._browser = None
+        self._keep_browser = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _run(self, coro):
+        """Run ``coro`` to completion on the recorder's own event loop.
+        
+        Playwright objects are bound to the loop that created them, so the
+        sync API reuses one loop for the browser kept by ``with``; outside
+        it the loop is closed after each call.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        try:
+            return self._loop.run_until_complete(coro)
+        finally:
+            if not self._keep_browser:
+                self._loop.close()
+                self._loop = None
+    
+    def __enter__(self) -> "VideoRecorder":
+        self._keep_browser = True
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._keep_browser = False
+        self.close()
+    
+    async def __aenter__(self) -> "VideoRecorder":
+        self._keep_browser = True
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        self._keep_browser = False
+        await self.aclose()
+    
+    async def _get_browser(self) -> "Browser":
+        """Return the shared browser, launching it on first use."""
+        if self._browser is None:
+            from playwright.async_api import async_playwright
+            
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                slow_mo=self.slow_mo,
+            )
+        return self._browser
+    
+    async def aclose(self) -> None:
+        """Close the shared browser, if one was started."""
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+    
+    def close(self) -> None:
+        """Close the shared browser and the recorder's event loop."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.run_until_complete(self.aclose())
+            self._loop.close()
+        self._loop = None
+    
+    async def _with_browser(self, run: Callable[["Browser"], Awaitable[T]]) -> T:
+        """Call ``run`` with the shared browser, or a temporary one."""
+        if self._keep_browser:
+            return await run(await self._get_browser())
+        
+        from playwright.async_api import async_playwright
+        
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(
+                headless=self.headless,
+                slow_mo=self.slow_mo,
+            )
+            try:
+                return await run(browser)
+            finally:
+                await browser.close()
     
     def record(
         self,
         scenes: list[Scene],
-        scene_durations: dict[str, float],
+        scene_durations: dict[str, float | Awaitable[float]],
+        login_url: Optional[str] = None,
+        login_action: Optional[Callable[["Page"], Any]] = None,
+        on_scene_start: Optional[Callable[[str, int], None]] = None,
+    ) -> RecordingResult:
+        """Record video from scenes (synchronous wrapper of ``record_async``).
+        
+        ``login_action`` must still be a coroutine function: it is called
+        with Playwright's async ``Page``.
+        """
+        return self._run(
+            self.record_async(scenes, scene_durations, login_url, login_action, on_scene_start)
+        )
+    
+    async def record_async(
+        self,
+        scenes: list[Scene],
+        scene_durations: dict[str, float | Awaitable[float]],
         login_url: Optional[str] = None,
-        login_action: Optional[Callable[[Page], None]] = None,
+        login_action: Optional[Callable[["Page"], Any]] = None,
         on_scene_start: Optional[Callable[[str, int], None]] = None,
     ) -> RecordingResult:
         """Record video from scenes.
         
         Args:
             scenes: List of scenes to record
-            scene_durations: Duration for each scene (usually from TTS audio)
+            scene_durations: Duration for each scene (usually from TTS audio).
+                A value may be an awaitable, such as a task still synthesizing
+                the narration; it is only awaited once the scene's actions
+                have run, so TTS can overlap the recording.
             login_url: Optional URL to login before recording
-            login_action: Optional callback to perform login
+            login_action: Optional coroutine function to perform login,
+                called with the async ``Page``
             on_scene_start: Optional callback when each scene starts
             
         Returns:
             RecordingResult with video path and timestamps
+            
+        Raises:
+            TypeError: If ``login_action`` is not a coroutine function
         """
-        timestamps = {}
-        login_duration = 0
+        # A sync callback would only create un-awaited coroutines from the
+        # async Page and silently skip the login
+        if login_action is not None and not inspect.iscoroutinefunction(login_action):
+            raise TypeError("login_action must be a coroutine function (async def)")
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=self.headless,
-                slow_mo=self.slow_mo,
+        return await self._with_browser(
+            lambda browser: self._record_in(
+                browser, scenes, scene_durations, login_url, login_action, on_scene_start
             )
-            
-            context = browser.new_context(
-                viewport={"width": self.resolution[0], "height": self.resolution[1]},
-                record_video_dir=str(self.output_dir),
-                record_video_size={"width": self.resolution[0], "height": self.resolution[1]},
-                locale="zh-CN",
-            )
-            
-            page = context.new_page()
+        )
+    
+    async def _new_context(self, browser: "Browser", video_dir: Path) -> "BrowserContext":
+        """Create a recording context with the DOM action runner installed."""
+        context = await browser.new_context(
+            viewport={"width": self.resolution[0], "height": self.resolution[1]},
+            record_video_dir=str(video_dir),
+            record_video_size={"width": self.resolution[0], "height": self.resolution[1]},
+            locale="zh-CN",
+        )
+        await context.add_init_script(_INSTALL_DOM_ACTIONS_JS)
+        if self.cache_assets:
+            await context.route(_ASSET_URL_RE, self._cache_route)
+        return context
+    
+    async def _cache_route(self, route: "Route") -> None:
+        """Serve GET asset requests from the in-memory cache.
+        
+        Scenes that revisit a page then load its images, fonts and scripts
+        without touching the network, so ``networkidle`` is reached almost
+        as soon as the document itself has loaded.
+        """
+        from playwright.async_api import Error as PlaywrightError
+        
+        request = route.request
+        if request.method != "GET" or request.resource_type not in _CACHEABLE_RESOURCE_TYPES:
+            await route.continue_()
+            return
+        
+        url = request.url
+        cached = self._asset_cache.get(url)
+        if cached is not None:
+            self._asset_cache.move_to_end(url)
+            status, headers, body = cached
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except PlaywrightError:
+            await route.abort()
+            return
+        
+        if response.status == 200 and len(body) <= _MAX_CACHED_ASSET_BYTES:
+            headers = {k: v for k, v in response.headers.items() if k in _CACHED_ASSET_HEADERS}
+            self._asset_cache[url] = (response.status, headers, body)
+            self._asset_cache_bytes += len(body)
+            while self._asset_cache_bytes > _ASSET_CACHE_MAX_BYTES:
+                _, (_, _, evicted) = self._asset_cache.popitem(last=False)
+                self._asset_cache_bytes -= len(evicted)
+        
+        await route.fulfill(response=response, body=body)
+    
+    async def _record_in(
+        self,
+        browser: "Browser",
+        scenes: list[Scene],
+        scene_durations: dict[str, float | Awaitable[float]],
+        login_url: Optional[str],
+        login_action: Optional[Callable[["Page"], Any]],
+        on_scene_start: Optional[Callable[[str, int], None]],
+    ) -> RecordingResult:
+        """Record ``scenes`` in a fresh context of ``browser``."""
+        login_duration = 0
+        
+        context = await self._new_context(browser, self.output_dir)
+        
+        try:
+            page = await context.new_page()
+            video = page.video
             video_start_time = time.time()
             
             # Perform login if needed
             if login_url and login_action:
-                page.goto(login_url, wait_until="networkidle")
-                login_action(page)
+                await self._goto(page, login_url)
+                await login_action(page)
                 login_duration = time.time() - video_start_time
             
             recording_start = time.time()
-            
-            # Record each scene
-            for i, scene in enumerate(scenes):
-                scene_id = scene.id
-                duration = scene_durations.get(scene_id, 5.0)
-                
-                scene_start = time.time() - recording_start
-                timestamps[scene_id] = {
-                    "start": scene_start,
-                    "audio_duration": duration,
-                }
-                
-                if on_scene_start:
-                    on_scene_start(scene_id, i + 1)
-                
-                # Navigate to URL if specified
-                if scene.url:
-                    current_url = page.url.split("#")[0]
-                    target_url = scene.url.split("#")[0]
-                    if current_url != target_url:
-                        page.goto(scene.url, wait_until="networkidle")
-                    elif "#" in scene.url:
-                        page.goto(scene.url)
-                
-                # Execute actions
-                action_time = 0
-                for action in scene.actions:
-                    action_time += self._execute_action(page, action)
-                
-                # Wait remaining time
-                remaining = duration - action_time
-                if remaining > 0:
-                    time.sleep(remaining)
-            
+            timestamps = await self._play_scenes(page, scenes, scene_durations, on_scene_start)
             total_duration = time.time() - recording_start
-            
-            context.close()
-            browser.close()
-        
-        # Find the recorded video file
-        video_files = list(self.output_dir.glob("*.webm"))
-        if video_files:
-            video_path = max(video_files, key=lambda x: x.stat().st_mtime)
-        else:
+        finally:
+            await context.close()
+        
+        # The page's own video, finalized by context.close(); globbing for the
+        # newest .webm could pick up another recording in the same directory
+        if video is None:
             raise RuntimeError("No video file was recorded")
         
         return RecordingResult(
-            video_path=video_path,
+            video_path=Path(await video.path()),
             timestamps=timestamps,
             total_duration=total_duration,
             login_duration=login_duration,
         )
     
-    def _execute_action(self, page: Page, action: Action) -> float:
-        """Execute a single action and return time spent."""
-        start = time.time()
+    def record_parallel(
+        self,
+        scenes: list[Scene],
+        scene_durations: dict[str, float],
+        max_workers: Optional[int] = None,
+        on_scene_start: Optional[Callable[[str, int], None]] = None,
+    ) -> RecordingResult:
+        """Synchronous wrapper of ``record_parallel_async``."""
+        return self._run(
+            self.record_parallel_async(scenes, scene_durations, max_workers, on_scene_start)
+        )
+    
+    async def record_parallel_async(
+        self,
+        scenes: list[Scene],
+        scene_durations: dict[str, float],
+        max_workers: Optional[int] = None,
+        on_scene_start: Optional[Callable[[str, int], None]] = None,
+    ) -> RecordingResult:
+        """Record independent parts of the script concurrently, then stitch.
+        
+        The script is split into segments at every scene that sets a
+        ``url``; scenes without one continue on the previous scene's page,
+        so they stay in its segment. Each segment is recorded in its own
+        browser context and the clips are joined with ffmpeg into one
+        H.264 MP4. Only use this when a scene with a ``url`` doesn't rely
+        on state (cookies, form input) left by earlier scenes. Login is not
+        supported here.
         
-        if action.type == "scroll":
-            y = action.params.get("y", 0)
-            smooth = action.params.get("smooth", False)
-            behavior = "smooth" if smooth else "instant"
-            page.evaluate(f"window.scrollTo({{top: {y}, behavior: '{behavior}'}})")
-            time.sleep(0.5)
+        With ``clip_cache_dir`` set, each segment's clip is stored under a
+        hash of its scenes (url, actions, duration) and the recording
+        settings; unchanged segments are reused for ``clip_cache_ttl``
+        seconds without opening a browser.
+        
+        Args:
+            scenes: List of scenes to record
+            scene_durations: Duration for each scene (usually from TTS audio)
+            max_workers: Maximum concurrent contexts (default: CPU count)
+            on_scene_start: Optional callback when each scene starts;
+                segments interleave, so calls come in no particular order
             
-        elif action.type == "scroll_to_text":
-            text = action.params.get("text", "")
-            offset = action.params.get("offset", 0)
-            try:
-                element = page.locator(f"text={text}").first
-                element.scroll_into_view_if_needed()
-                time.sleep(0.3)
-                page.evaluate(f"window.scrollBy(0, -{offset})")
-            except:
-                pass
-            time.sleep(0.5)
+        Returns:
+            RecordingResult with video path and timestamps
+        """
+        segments: list[list[tuple[int, Scene]]] = []
+        for index, scene in enumerate(scenes, 1):
+            if scene.url or not segments:
+                segments.append([])
+            segments[-1].append((index, scene))
+        
+        work_dir = self.output_dir / f"segments-{uuid.uuid4().hex[:8]}"
+        semaphore = asyncio.Semaphore(max_workers or os.cpu_count() or 1)
+        
+        keys = [self._segment_key(segment, scene_durations) for segment in segments]
+        clips = [self._cached_clip(key) for key in keys]
+        missing = [i for i, clip in enumerate(clips) if clip is None]
+        
+        async def record_missing(browser: "Browser") -> list["_SegmentClip"]:
+            async def bounded(i: int) -> "_SegmentClip":
+                async with semaphore:
+                    return await self._record_segment(
+                        browser, segments[i], scene_durations, work_dir / str(i), on_scene_start
+                    )
             
-        elif action.type == "click":
-            selector = action.params.get("selector", "")
-            text = action.params.get("text", "")
-            timeout = action.params.get("timeout", 3000)
-            try:
-                if text:
-                    page.click(f"text={text}", timeout=timeout)
-                elif selector:
-                    page.click(selector, timeout=timeout)
-            except:
-                pass
-            time.sleep(0.5)
+            return await asyncio.gather(*[bounded(i) for i in missing])
+        
+        try:
+            if missing:
+                recorded = await self._with_browser(record_missing)
+                for i, clip in zip(missing, recorded):
+                    clips[i] = self._store_clip(keys[i], clip)
+            
+            output_path = self.output_dir / f"{work_dir.name}.mp4"
+            await asyncio.to_thread(self._stitch, clips, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        # Shift each segment's scene starts by the segments before it
+        timestamps = {}
+        offset = 0.0
+        for clip in clips:
+            for scene_id, ts in clip.timestamps.items():
+                timestamps[scene_id] = {**ts, "start": ts["start"] + offset}
+            offset += clip.duration
+        
+        return RecordingResult(
+            video_path=output_path,
+            timestamps=timestamps,
+            total_duration=offset,
+        )
+    
+    def _segment_key(
+        self,
+        indexed_scenes: list[tuple[int, Scene]],
+        scene_durations: dict[str, float],
+    ) -> str:
+        """Hash everything that determines a segment's recorded frames."""
+        material = json.dumps(
+            {
+                "scenes": [
+                    {
+                        "id": scene.id,
+                        "url": scene.url,
+                        "actions": [[a.type, a.params] for a in scene.actions],
+                        "duration": scene_durations.get(scene.id, 5.0),
+                    }
+                    for _, scene in indexed_scenes
+                ],
+                "resolution": list(self.resolution),
+                "slow_mo": self.slow_mo,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    def _cached_clip(self, key: str) -> Optional["_SegmentClip"]:
+        """Return the cached clip for ``key`` if present and fresh."""
+        if self.clip_cache_dir is None:
+            return None
+        
+        video_path = self.clip_cache_dir / f"{key}.webm"
+        meta_path = self.clip_cache_dir / f"{key}.json"
+        try:
+            if time.time() - video_path.stat().st_mtime >= self.clip_cache_ttl:
+                return None
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        
+        return _SegmentClip(
+            video_path=video_path,
+            duration=meta["duration"],
+            timestamps=meta["timestamps"],
+        )
+    
+    def _store_clip(self, key: str, clip: "_SegmentClip") -> "_SegmentClip":
+        """Copy a freshly recorded clip into the cache, if enabled."""
+        if self.clip_cache_dir is None:
+            return clip
+        
+        self.clip_cache_dir.mkdir(parents=True, exist_ok=True)
+        video_path = self.clip_cache_dir / f"{key}.webm"
+        
+        # Private temp file first so a concurrent run never reads half a clip
+        tmp_path = self.clip_cache_dir / f"{key}.{uuid.uuid4().hex}.part"
+        shutil.copyfile(clip.video_path, tmp_path)
+        os.replace(tmp_path, video_path)
+        (self.clip_cache_dir / f"{key}.json").write_text(
+            json.dumps({"duration": clip.duration, "timestamps": clip.timestamps}),
+            encoding="utf-8",
+        )
+        
+        return _SegmentClip(
+            video_path=video_path,
+            duration=clip.duration,
+            timestamps=clip.timestamps,
+        )
+    
+    async def _record_segment(
+        self,
+        browser: "Browser",
+        indexed_scenes: list[tuple[int, Scene]],
+        scene_durations: dict[str, float],
+        segment_dir: Path,
+        on_scene_start: Optional[Callable[[str, int], None]],
+    ) -> "_SegmentClip":
+        """Record one segment in its own context of ``browser``."""
+        first_index = indexed_scenes[0][0]
+        scenes = [scene for _, scene in indexed_scenes]
+        
+        context = await self._new_context(browser, segment_dir)
+        try:
+            page = await context.new_page()
+            video = page.video
+            scenes_start = time.time()
+            timestamps = await self._play_scenes(
+                page, scenes, scene_durations, on_scene_start, first_index
+            )
+            duration = time.time() - scenes_start
+        finally:
+            await context.close()
+        
+        return _SegmentClip(
+            video_path=Path(await video.path()),
+            duration=duration,
+            timestamps=timestamps,
+        )
+    
+    def _stitch(self, clips: list["_SegmentClip"], output_path: Path) -> None:
+        """Cut each clip to its scenes and concatenate them with ffmpeg."""
+        from moviepy.config import FFMPEG_BINARY
+        
+        cmd = [FFMPEG_BINARY, "-y"]
+        for clip in clips:
+            # Drop the tail recorded while the context was closing
+            cmd += ["-t", f"{clip.duration:.3f}", "-i", str(clip.video_path)]
+        inputs = "".join(f"[{i}:v]" for i in range(len(clips)))
+        cmd += [
+            "-filter_complex", f"{inputs}concat=n={len(clips)}:v=1:a=0[v]",
+            "-map", "[v]",
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", "18",
+            "-pix_fmt", "yuv420p",
+            str(output_path),
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to stitch segments:\n{result.stderr[-2000:]}")
+    
+    async def _play_scenes(
+        self,
+        page: "Page",
+        scenes: list[Scene],
+        scene_durations: dict[str, float | Awaitable[float]],
+        on_scene_start: Optional[Callable[[str, int], None]] = None,
+        first_index: int = 1,
+    ) -> dict[str, dict]:
+        """Play scenes on ``page``, pacing each to its audio duration.
+        
+        Returns timestamps relative to the first scene's start.
+        """
+        timestamps = {}
+        recording_start = time.time()
+        
+        for i, scene in enumerate(scenes, first_index):
+            scene_id = scene.id
+            duration = scene_durations.get(scene_id, 5.0)
+            
+            scene_start = time.time() - recording_start
+            timestamps[scene_id] = {"start": scene_start}
+            
+            if on_scene_start:
+                on_scene_start(scene_id, i)
             
-        elif action.type == "fill":
-            selector = action.params.get("selector", "")
-            value = action.params.get("value", "")
-            page.fill(selector, value)
-            time.sleep(0.3)
+            # Navigate to URL if specified
+            if scene.url:
+                current_url = page.url.split("#")[0]
+                target_url = scene.url.split("#")[0]
+                if current_url != target_url:
+                    await self._goto(page, scene.url)
+                elif "#" in scene.url:
+                    await page.goto(scene.url)
             
-        elif action.type == "wait":
-            duration = action.params.get("duration", 1)
-            if duration != "auto":
-                time.sleep(duration)
-                
-        elif action.type == "goto":
-            url = action.params.get("url", "")
-            page.goto(url, wait_until="networkidle")
-            time.sleep(0.5)
+            # Execute actions
+            action_time = await self._execute_actions(page, scene.actions)
             
-        elif action.type == "scroll_iframe":
-            positions = action.params.get("positions", [300, 600, 900])
-            interval = action.params.get("interval", 1.5)
-            for pos in positions:
-                page.evaluate(f"""
-                    const iframe = document.querySelector('iframe');
-                    if (iframe && iframe.contentWindow) {{
-                        iframe.contentWindow.scrollTo({{top: {pos}, behavior: 'smooth'}});
-                    }}
-                """)
-                time.sleep(interval)
+            # The duration is only needed from here on, so audio that is
+            # still being generated had the actions' time to finish. Time
+            # spent waiting for it already counts towards the scene.
+            tts_wait = 0.0
+            if inspect.isawaitable(duration):
+                wait_start = time.time()
+                duration = await duration
+                tts_wait = time.time() - wait_start
+            timestamps[scene_id]["audio_duration"] = duration
+            
+            # Wait remaining time
+            remaining = duration - action_time - tts_wait
+            if remaining > 0:
+                await self._pause(page, remaining)
+        
+        return timestamps
+    
+    @staticmethod
+    async def _pause(page: "Page", seconds: float) -> None:
+        """Hold the page for ``seconds`` while the video keeps recording.
+        
+        The deadline is checked inside the page, so the whole pause is one
+        protocol call that returns as soon as it passes; a page that crashes
+        or closes fails the wait instead of being slept past.
+        """
+        if seconds <= 0:
+            return
+        await page.wait_for_function(
+            "deadline => Date.now() >= deadline",
+            arg=(time.time() + seconds) * 1000,
+            polling=50,
+            timeout=seconds * 1000 + 5000,
+        )
+    
+    @staticmethod
+    async def _goto(page: "Page", url: str) -> None:
+        """Navigate, waiting at most 1.5s past DOMContentLoaded for idle.
+        
+        Analytics and chat widgets can keep the network busy for seconds,
+        all of which would otherwise end up in the recording.
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        
+        await page.goto(url, wait_until="domcontentloaded")
+        try:
+            await page.wait_for_load_state("networkidle", timeout=1500)
+        except PlaywrightTimeoutError:
+            pass
+    
+    async def _execute_actions(self, page: "Page", actions: list[Action]) -> float:
+        """Execute a scene's actions and return time spent.
+        
+        Runs of consecutive DOM-only actions are sent to the page together;
+        everything else goes through Playwright one action at a time.
+        """
+        start = time.time()
+        
+        batch = []
+        for action in actions:
+            if action.type in _DOM_ACTIONS:
+                batch.append({"type": action.type, **action.params})
+                continue
+            if batch:
+                await self._run_dom_actions(page, batch)
+                batch = []
+            await self._execute_action(page, action)
+        if batch:
+            await self._run_dom_actions(page, batch)
+        
+        return time.time() - start
+    
+    @staticmethod
+    async def _run_dom_actions(page: "Page", batch: list[dict]) -> None:
+        """Run a batch of DOM actions in the page."""
+        if not await page.evaluate(_CALL_DOM_ACTIONS_JS, batch):
+            await page.evaluate(_INLINE_DOM_ACTIONS_JS, batch)
+    
+    async def _execute_action(self, page: "Page", action: Action) -> float:
+        """Execute a single action and return time spent."""
+        start = time.time()
+        
+        handler = self._ACTION_HANDLERS.get(action.type)
+        if handler is not None:
+            await handler(self, page, action.params)
         
         return time.time() - start
+    
+    async def _do_click(self, page: "Page", params: dict) -> None:
+        selector = params.get("selector", "")
+        text = params.get("text", "")
+        timeout = params.get("timeout", 3000)
+        try:
+            if text:
+                await page.click(f"text={text}", timeout=timeout)
+            elif selector:
+                await page.click(selector, timeout=timeout)
+        except:
+            pass
+        await self._pause(page, 0.5)
+    
+    async def _do_fill(self, page: "Page", params: dict) -> None:
+        selector = params.get("selector", "")
+        value = params.get("value", "")
+        await page.fill(selector, value)
+        await self._pause(page, 0.3)
+    
+    async def _do_wait(self, page: "Page", params: dict) -> None:
+        duration = params.get("duration", 1)
+        if duration != "auto":
+            await self._pause(page, duration)
+    
+    async def _do_goto(self, page: "Page", params: dict) -> None:
+        url = params.get("url", "")
+        await self._goto(page, url)
+        await self._pause(page, 0.5)
+    
+    # Action type -> handler for actions that need Playwright; DOM-only
+    # types are batched by _execute_actions instead
+    _ACTION_HANDLERS = {
+        "click": _do_click,
+        "fill": _do_fill,
+        "wait": _do_wait,
+        "goto": _do_goto,
+    }
@@ -1,13 +1,20 @@
 """Script parser for demo video generation."""
 
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Optional
 from pathlib import Path
+import orjson
 import yaml
-import json
 
+# libyaml C loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
 
-@dataclass
+
+@dataclass(slots=True)
 class Action:
     """A single action in a scene."""
     type: str  # scroll, click, wait, goto, fill, etc.
@@ -15,11 +22,11 @@ class Action:
     
     @classmethod
     def from_dict(cls, data: dict) -> "Action":
-        action_type = data.pop("type")
-        return cls(type=action_type, params=data)
+        params = {k: v for k, v in data.items() if k != "type"}
+        return cls(type=data["type"], params=params)
 
 
-@dataclass
+@dataclass(slots=True)
 class Scene:
     """A single scene in the video."""
     id: str
@@ -30,11 +37,14 @@ class Scene:
     
     @classmethod
     def from_dict(cls, data: dict) -> "Scene":
-        actions = [Action.from_dict(a) for a in data.pop("actions", [])]
-        return cls(actions=actions, **data)
+        # Bound once rather than looked up per action; the input is not mutated
+        action = Action.from_dict
+        actions = [action(a) for a in data.get("actions", ())]
+        fields = {k: v for k, v in data.items() if k != "actions"}
+        return cls(actions=actions, **fields)
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     """Project configuration."""
     name: str = "Demo Video"
@@ -46,12 +56,12 @@ class Project:
     
     @classmethod
     def from_dict(cls, data: dict) -> "Project":
-        if "resolution" in data and isinstance(data["resolution"], list):
-            data["resolution"] = tuple(data["resolution"])
+        if isinstance(data.get("resolution"), list):
+            data = {**data, "resolution": tuple(data["resolution"])}
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class Script:
     """Complete video script."""
     project: Project
@@ -60,43 +70,56 @@ class Script:
     @classmethod
     def from_dict(cls, data: dict) -> "Script":
         project = Project.from_dict(data.get("project", {}))
-        scenes = [Scene.from_dict(s) for s in data.get("scenes", [])]
+        scene = Scene.from_dict
+        scenes = [scene(s) for s in data.get("scenes", ())]
         return cls(project=project, scenes=scenes)
 
 
+@lru_cache(maxsize=32)
+def _parse_file(path: Path, mtime_ns: int, size: int) -> dict:
+    """Load a script file's raw data; keyed on stat so edits invalidate it."""
+    if path.suffix in (".yaml", ".yml"):
+        data = yaml.load(path.read_text(encoding="utf-8"), Loader=_YamlLoader)
+    elif path.suffix == ".json":
+        # orjson parses the raw UTF-8 bytes directly
+        data = orjson.loads(path.read_bytes())
+    else:
+        # Try YAML first, then JSON
+        content = path.read_text(encoding="utf-8")
+        try:
+            data = yaml.load(content, Loader=_YamlLoader)
+        except:
+            data = orjson.loads(content)
+    
+    return data
+
+
 class ScriptParser:
     """Parse script files in YAML or JSON format."""
     
     @staticmethod
     def parse(file_path: str | Path) -> Script:
-        """Parse a script file."""
-        path = Path(file_path)
+        """Parse a script file.
         
-        if not path.exists():
-            raise FileNotFoundError(f"Script file not found: {path}")
+        The loaded data is reused while the file's mtime and size are
+        unchanged; each call builds a new Script from it.
+        """
+        path = Path(file_path)
         
-        content = path.read_text(encoding="utf-8")
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Script file not found: {path}") from None
         
-        if path.suffix in (".yaml", ".yml"):
-            data = yaml.safe_load(content)
-        elif path.suffix == ".json":
-            data = json.loads(content)
-        else:
-            # Try YAML first, then JSON
-            try:
-                data = yaml.safe_load(content)
-            except:
-                data = json.loads(content)
-        
-        return Script.from_dict(data)
+        return Script.from_dict(_parse_file(path.resolve(), st.st_mtime_ns, st.st_size))
     
     @staticmethod
     def parse_string(content: str, format: str = "yaml") -> Script:
         """Parse a script from string."""
         if format == "yaml":
-            data = yaml.safe_load(content)
+            data = yaml.load(content, Loader=_YamlLoader)
         else:
-            data = json.loads(content)
+            data = orjson.loads(content)
         return Script.from_dict(data)
     
     @staticmethod
@@ -122,4 +145,10 @@ class ScriptParser:
                 for s in script.scenes
             ],
         }
-        return yaml.dump(data, allow_unicode=True, sort_keys=False)
+        return yaml.dump(
+            data,
+            Dumper=_YamlDumper,
+            allow_unicode=True,
+            sort_keys=False,
+            default_flow_style=False,
+        )
@@ -1,10 +1,72 @@
 """Text-to-Speech engine using Edge TTS."""
 
 import asyncio
+import hashlib
+import json
+import os
+import uuid
 from pathlib import Path
 from typing import Optional
-import edge_tts
-from mutagen.mp3 import MP3
+
+
+# MPEG audio Layer III header tables, indexed by the header's bit fields
+_MP3_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MP3_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _fast_mp3_duration(path: str | Path) -> Optional[float]:
+    """Read an MP3's duration from its first frame header.
+    
+    Uses the Xing/Info or VBRI frame count when present, otherwise assumes
+    CBR (which is what Edge TTS emits) and divides the audio size by the
+    bitrate. Returns None for anything that isn't plain MPEG Layer III.
+    """
+    with open(path, "rb") as f:
+        head = f.read(10)
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        
+        # Skip an ID3v2 tag (synchsafe size, plus footer if flagged)
+        start = 0
+        if head[:3] == b"ID3" and len(head) == 10:
+            start = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+            if head[5] & 0x10:
+                start += 10
+        
+        f.seek(start)
+        buf = f.read(256)
+        f.seek(max(file_size - 128, 0))
+        has_id3v1 = f.read(3) == b"TAG"
+    
+    if len(buf) < 4 or buf[0] != 0xFF or buf[1] & 0xE0 != 0xE0:
+        return None
+    
+    version = (buf[1] >> 3) & 0x03
+    layer = (buf[1] >> 1) & 0x03
+    bitrate_index = buf[2] >> 4
+    rate_index = (buf[2] >> 2) & 0x03
+    mono = (buf[3] >> 6) == 3
+    if version == 1 or layer != 1 or rate_index == 3 or bitrate_index in (0, 15):
+        return None
+    
+    mpeg1 = version == 3
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    samples_per_frame = 1152 if mpeg1 else 576
+    
+    # Xing/Info tag sits right after the side information
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = 4 + side_info
+    if buf[xing:xing + 4] in (b"Xing", b"Info") and buf[xing + 7] & 0x01:
+        frames = int.from_bytes(buf[xing + 8:xing + 12], "big")
+        return frames * samples_per_frame / sample_rate
+    if buf[36:40] == b"VBRI":
+        frames = int.from_bytes(buf[50:54], "big")
+        return frames * samples_per_frame / sample_rate
+    
+    bitrates = _MP3_BITRATES_V1 if mpeg1 else _MP3_BITRATES_V2
+    audio_bytes = file_size - start - (128 if has_id3v1 else 0)
+    return audio_bytes * 8 / (bitrates[bitrate_index] * 1000)
 
 
 class TTSEngine:
@@ -25,6 +87,8 @@ class TTSEngine:
         
         Returns the duration of the generated audio in seconds.
         """
+        import edge_tts
+        
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
@@ -38,6 +102,82 @@ class TTSEngine:
         
         return self.get_duration(output_path)
     
+    async def generate_many(
+        self,
+        jobs: list[tuple[str, str | Path]],
+        concurrency: int = 8,
+    ) -> list[float]:
+        """Generate several audio files concurrently.
+        
+        Args:
+            jobs: (text, output_path) pairs
+            concurrency: Maximum simultaneous Edge TTS requests
+            
+        Returns:
+            Durations in seconds, in the same order as ``jobs``
+        """
+        import edge_tts
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(text: str, output_path: str | Path) -> float:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            communicate = edge_tts.Communicate(
+                text,
+                self.voice,
+                rate=self.rate,
+                volume=self.volume,
+            )
+            async with semaphore:
+                await communicate.save(str(output_path))
+            # Duration probing is file I/O; keep it off the event loop
+            return await asyncio.to_thread(self.get_duration, output_path)
+        
+        return await asyncio.gather(*[run(text, path) for text, path in jobs])
+    
+    def generate_many_sync(
+        self,
+        jobs: list[tuple[str, str | Path]],
+        concurrency: int = 8,
+    ) -> list[float]:
+        """Generate several audio files concurrently, synchronously."""
+        return asyncio.run(self.generate_many(jobs, concurrency))
+    
+    def cache_key(self, text: str) -> str:
+        """Key identifying the audio for this text and voice settings."""
+        raw = f"{self.voice}|{self.rate}|{self.volume}|{text}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    
+    async def generate_cached(self, text: str, cache_dir: str | Path) -> tuple[Path, float]:
+        """Generate audio into a content-addressed cache.
+        
+        Audio is stored as ``{cache_dir}/{key}.mp3`` with its duration in a
+        ``{key}.json`` sidecar, so identical narrations are synthesized only
+        once across runs and tasks.
+        
+        Returns the cached audio path and its duration in seconds.
+        """
+        cache_dir = Path(cache_dir)
+        key = self.cache_key(text)
+        audio_path = cache_dir / f"{key}.mp3"
+        meta_path = cache_dir / f"{key}.json"
+        
+        if audio_path.exists() and meta_path.exists():
+            try:
+                return audio_path, json.loads(meta_path.read_text())["duration"]
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        # Write to a private temp file first so concurrent requests for the
+        # same text never expose a half-written cache entry
+        tmp_path = cache_dir / f"{key}.{uuid.uuid4().hex}.part"
+        duration = await self.generate_async(text, tmp_path)
+        os.replace(tmp_path, audio_path)
+        meta_path.write_text(json.dumps({"duration": duration}))
+        
+        return audio_path, duration
+    
     def generate(self, text: str, output_path: str | Path) -> float:
         """Generate audio file from text synchronously.
         
@@ -48,12 +188,24 @@ class TTSEngine:
     @staticmethod
     def get_duration(audio_path: str | Path) -> float:
         """Get the duration of an audio file in seconds."""
+        try:
+            duration = _fast_mp3_duration(audio_path)
+        except (OSError, IndexError):
+            duration = None
+        if duration is not None:
+            return duration
+        
+        # Malformed or unusual headers: let mutagen scan the file
+        from mutagen.mp3 import MP3
+        
         audio = MP3(str(audio_path))
         return audio.info.length
     
     @staticmethod
     async def list_voices(language: Optional[str] = None) -> list[dict]:
         """List available voices, optionally filtered by language."""
+        import edge_tts
+        
         voices = await edge_tts.list_voices()
         
         if language: